@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import User
+
+# Claims, которые LoginView кладёт в токен: права проверяются без SELECT пользователя
+TOKEN_CLAIMS = ('role', 'is_verified')
+
+# Кэш процесса (не из CACHES): у каждого воркера свой, TTL ограничивает устаревание
+user_cache = LocMemCache('accounts-users', {
+    'TIMEOUT': settings.ACCOUNTS_AUTH['USER_CACHE_TTL'],
+    'OPTIONS': {'MAX_ENTRIES': settings.ACCOUNTS_AUTH['USER_CACHE_MAXSIZE']},
+})
+
+
+def tokens_for(user):
+    refresh = RefreshToken.for_user(user)
+    for claim in TOKEN_CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    return refresh
+
+
+class WarehouseTokenUser(TokenUser):
+    """Пользователь из подписанных claims токена: id, role, is_verified без запроса в БД."""
+
+    @property
+    def role(self):
+        return self.token.get('role')
+
+    @property
+    def is_verified(self):
+        return self.token.get('is_verified', False)
+
+
+def get_cached_user(user_id):
+    """Полная модель пользователя через локальный кэш с коротким TTL."""
+    user = user_cache.get(user_id)
+    if user is None:
+        try:
+            user = User.objects.get(pk=user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        user_cache.set(user_id, user)
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    return user
+
+
+def forget_user(user_id):
+    user_cache.delete(user_id)
+
+
+def request_user(request):
+    """Для эндпоинтов, которым нужна модель (сохранение, FK): TokenUser заменяется на User из кэша."""
+    if isinstance(request.user, User):
+        return request.user
+    return get_cached_user(request.user.id)
+
+
+class TokenUserAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT без SELECT пользователя на каждый запрос: request.user — WarehouseTokenUser.
+    Токены, выданные до появления claims, проходят через get_cached_user.
+    Смена роли или деактивация вступают в силу с новым токеном.
+    """
+
+    def get_user(self, validated_token):
+        if all(claim in validated_token for claim in TOKEN_CLAIMS):
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        return get_cached_user(user_id)
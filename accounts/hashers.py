@@ -0,0 +1,39 @@
+"""
+Хэшеры паролей со стоимостью из settings.PASSWORD_HASHING. Алгоритмы те же, что у Django,
+поэтому существующие хэши проверяются как прежде; при смене стоимости must_update
+срабатывает на первом успешном входе и пароль перехэшируется с новыми параметрами.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return settings.PASSWORD_HASHING['BCRYPT_ROUNDS']
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Нужен пакет argon2-cffi: без него PASSWORD_HASH_ALGORITHM=argon2 — ошибка конфигурации."""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_HASHING['ARGON2_TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_HASHING['ARGON2_MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_HASHING['ARGON2_PARALLELISM']
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING['PBKDF2_ITERATIONS']
@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+import logging
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+# SMTP‑соединение процесса‑воркера: открывается при первой отправке и живёт между задачами
+_connection = None
+
+
+def queue_mail(subject, message, recipient_list, from_email=None):
+    """Ставит письмо в очередь; отправка — после коммита, в Celery, без SMTP в запросе."""
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+    transaction.on_commit(_dispatch)
+    return email
+
+
+def queue_messages(messages, batch_size=None):
+    """
+    Ставит в очередь готовые EmailMessage одним bulk_create (рассылки вроде дайджестов).
+    Отправка — так же после коммита, в Celery. Возвращает число писем в очереди.
+    """
+    emails = [
+        OutgoingEmail(
+            subject=message.subject,
+            body=message.body,
+            from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=list(message.recipients()),
+        )
+        for message in messages
+    ]
+    if emails:
+        OutgoingEmail.objects.bulk_create(emails, batch_size=batch_size or settings.MAIL_QUEUE['BATCH_SIZE'])
+        transaction.on_commit(_dispatch)
+    return len(emails)
+
+
+def _dispatch():
+    from .tasks import flush_outbox
+    try:
+        flush_outbox.delay()
+    except Exception:
+        # Брокер недоступен: письмо осталось в очереди, его заберёт периодический flush
+        logger.exception("Failed to enqueue the mail flush task")
+
+
+def get_mail_connection():
+    global _connection
+    if _connection is None:
+        _connection = get_connection()
+    _connection.open()
+    return _connection
+
+
+def close_mail_connection():
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.close()
+        finally:
+            _connection = None
+
+
+def _send(message):
+    connection = get_mail_connection()
+    try:
+        connection.send_messages([message])
+    except SMTPServerDisconnected:
+        # Сервер закрыл простаивающее соединение — один повтор через новое
+        close_mail_connection()
+        get_mail_connection().send_messages([message])
+
+
+def retry_delay(attempts):
+    config = settings.MAIL_QUEUE
+    return timedelta(seconds=min(config['RETRY_DELAY'] * 2 ** (attempts - 1), config['RETRY_MAX_DELAY']))
+
+
+def send_batch(batch_size=None):
+    """
+    Забирает пачку писем, которым пора уходить (FOR UPDATE SKIP LOCKED — воркеры не мешают
+    друг другу), и отправляет их через одно соединение. Неудачные получают следующую попытку
+    с экспоненциальной задержкой. Возвращает (отправлено, с ошибкой).
+    """
+    config = settings.MAIL_QUEUE
+    batch_size = batch_size or config['BATCH_SIZE']
+    now = timezone.now()
+    sent = []
+    failed = []
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for email in batch:
+            message = EmailMessage(email.subject, email.body, email.from_email, email.recipients)
+            email.attempts += 1
+            try:
+                _send(message)
+            except Exception as exc:
+                logger.warning("Mail %s attempt %s failed: %s", email.id, email.attempts, exc)
+                close_mail_connection()
+                email.last_error = str(exc)
+                if email.attempts >= config['MAX_ATTEMPTS']:
+                    email.status = OutgoingEmail.STATUS_FAILED
+                else:
+                    email.next_attempt_at = now + retry_delay(email.attempts)
+                failed.append(email)
+            else:
+                email.status = OutgoingEmail.STATUS_SENT
+                email.sent_at = timezone.now()
+                sent.append(email)
+        OutgoingEmail.objects.bulk_update(
+            sent + failed, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at'],
+        )
+    return len(sent), len(failed)
+
+
+def flush_outbox(batch_size=None):
+    """Отправляет все письма, которым пора уходить, пачками. Возвращает (отправлено, с ошибкой)."""
+    batch_size = batch_size or settings.MAIL_QUEUE['BATCH_SIZE']
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = send_batch(batch_size)
+        total_sent += sent
+        total_failed += failed
+        if sent + failed < batch_size:
+            return total_sent, total_failed
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from concurrent.futures import ThreadPoolExecutor
+import importlib.util
+import os
+import time
+from accounts.hashers import TunedBCryptSHA256PasswordHasher, TunedArgon2PasswordHasher, TunedPBKDF2PasswordHasher
+
+PASSWORD = 'cashier-shift-password-42'
+
+
+def fixed(hasher_class, **params):
+    # Параметры задаются атрибутами подкласса вместо значений из settings
+    return type(f'Bench{hasher_class.__name__}', (hasher_class,), params)()
+
+
+class Command(BaseCommand):
+    help = (
+        'Password verification throughput for each hasher setting: logins per second on one core '
+        'and with a thread pool (bcrypt and argon2 release the GIL, so threads scale with cores).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bcrypt-rounds', type=int, nargs='*', default=[10, 11, 12, 13])
+        parser.add_argument('--pbkdf2-iterations', type=int, nargs='*', default=[600000, 1000000])
+        parser.add_argument('--argon2', action='store_true', help='also measure argon2 with the configured costs')
+        parser.add_argument('--logins', type=int, default=20, help='verifications per setting and thread')
+        parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+
+    def candidates(self, options):
+        for rounds in options['bcrypt_rounds']:
+            yield f"bcrypt_sha256 rounds={rounds}", fixed(TunedBCryptSHA256PasswordHasher, rounds=rounds)
+        for iterations in options['pbkdf2_iterations']:
+            yield f"pbkdf2_sha256 iterations={iterations}", fixed(TunedPBKDF2PasswordHasher, iterations=iterations)
+        if options['argon2']:
+            if importlib.util.find_spec('argon2') is None:
+                self.stdout.write(self.style.WARNING("argon2-cffi is not installed, skipping argon2"))
+                return
+            config = settings.PASSWORD_HASHING
+            yield (
+                f"argon2 t={config['ARGON2_TIME_COST']} m={config['ARGON2_MEMORY_COST']} "
+                f"p={config['ARGON2_PARALLELISM']}",
+                fixed(TunedArgon2PasswordHasher, time_cost=config['ARGON2_TIME_COST'],
+                      memory_cost=config['ARGON2_MEMORY_COST'], parallelism=config['ARGON2_PARALLELISM']),
+            )
+
+    def verify_many(self, hasher, encoded, count):
+        for _ in range(count):
+            if not hasher.verify(PASSWORD, encoded):
+                raise AssertionError("verification failed")
+
+    def handle(self, *args, **options):
+        logins, threads = options['logins'], options['threads']
+        self.stdout.write(f"{logins} logins per setting and thread, {threads} threads, {os.cpu_count()} CPUs")
+        self.stdout.write(f"{'setting':<36}{'ms/login':>10}{'logins/s/core':>15}{'threaded logins/s':>19}")
+        for name, hasher in self.candidates(options):
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+
+            started = time.perf_counter()
+            self.verify_many(hasher, encoded, logins)
+            single = time.perf_counter() - started
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(lambda _: self.verify_many(hasher, encoded, logins), range(threads)))
+            pooled = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{name:<36}{single / logins * 1000:>10.1f}{logins / single:>15.1f}"
+                f"{logins * threads / pooled:>19.1f}"
+            )
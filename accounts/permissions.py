@@ -1,5 +1,7 @@
 from rest_framework.permissions import BasePermission
 
+# request.user — User или WarehouseTokenUser: роль во втором случае берётся из claim токена
+
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.role == 'admin'
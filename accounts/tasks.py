@@ -0,0 +1,14 @@
+from celery import shared_task
+from celery.signals import worker_process_shutdown
+from .mail import flush_outbox as flush, close_mail_connection
+
+
+@shared_task
+def flush_outbox():
+    sent, failed = flush()
+    return f"Sent {sent} queued emails, {failed} failed"
+
+
+@worker_process_shutdown.connect
+def close_connection_on_shutdown(**kwargs):
+    close_mail_connection()
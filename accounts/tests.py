@@ -1,7 +1,18 @@
+from django.conf import settings
+from django.core import mail
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import User
+from rest_framework_simplejwt.tokens import AccessToken
+from .authentication import user_cache
+from .mail import queue_mail, flush_outbox, close_mail_connection
+from .throttling import local_store, stats
+from .models import User, OutgoingEmail
 
 class AccountsTests(APITestCase):
     def test_registration(self):
@@ -14,3 +25,134 @@ class AccountsTests(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(User.objects.filter(email='maxsatul2007@gmail.com').exists())
+
+
+class TokenClaimsTests(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            email='claims@example.com', username='claims', password='strong_password_123',
+            role='manager', is_verified=True,
+        )
+
+    def login(self):
+        response = self.client.post(reverse('login'), {
+            'email': 'claims@example.com', 'password': 'strong_password_123',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['token']
+
+    def test_permissions_come_from_token_claims(self):
+        token = self.login()
+        claims = AccessToken(token)
+        self.assertEqual((claims['role'], claims['is_verified']), ('manager', True))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        # Только запрос списка: пользователь из БД не читается
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse('store-items')).status_code, status.HTTP_200_OK)
+
+        User.objects.filter(pk=self.user.pk).update(role='customer')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login()}')
+        self.assertEqual(self.client.get(reverse('store-items')).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_token_without_claims_uses_cached_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        with self.assertNumQueries(2):
+            self.client.get(reverse('store-items'))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse('store-items')).status_code, status.HTTP_200_OK)
+
+
+class MailQueueTests(APITestCase):
+    def setUp(self):
+        close_mail_connection()
+
+    def test_register_queues_mail_and_flush_sends_it(self):
+        with mock.patch('accounts.tasks.flush_outbox.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('register'), {
+                    'email': 'queued@example.com', 'password': 'strong_password_123', 'username': 'queued',
+                }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        delay.assert_called_once()
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(flush_outbox(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ['queued@example.com'])
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmail.STATUS_SENT)
+        self.assertEqual(flush_outbox(), (0, 0))
+
+    @override_settings(MAIL_QUEUE={'BATCH_SIZE': 2, 'MAX_ATTEMPTS': 2, 'RETRY_DELAY': 30, 'RETRY_MAX_DELAY': 60})
+    def test_failed_sends_back_off_then_give_up(self):
+        for pos in range(3):
+            queue_mail('Code', f'Your code: {pos}', [f'user{pos}@example.com'])
+        with mock.patch('accounts.mail._send', side_effect=SMTPException('421 try later')):
+            self.assertEqual(flush_outbox(), (0, 3))
+            email = OutgoingEmail.objects.order_by('id').first()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('pending', 1, '421 try later'))
+            self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=25))
+            # До следующей попытки письма не трогаются
+            self.assertEqual(flush_outbox(), (0, 0))
+
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(flush_outbox(), (0, 3))
+        self.assertEqual(OutgoingEmail.objects.filter(status=OutgoingEmail.STATUS_FAILED).count(), 3)
+
+
+class PasswordRehashTests(APITestCase):
+    def hashing(self, **overrides):
+        return override_settings(PASSWORD_HASHING={**settings.PASSWORD_HASHING, **overrides})
+
+    def test_login_rehashes_with_the_configured_cost(self):
+        with self.hashing(BCRYPT_ROUNDS=4):
+            user = User.objects.create_user(
+                email='cashier@example.com', username='cashier', password='strong_password_123', is_verified=True,
+            )
+        self.assertTrue(user.password.startswith('bcrypt_sha256$$2b$04$'))
+
+        with self.hashing(BCRYPT_ROUNDS=5):
+            response = self.client.post(reverse('login'), {
+                'email': 'cashier@example.com', 'password': 'strong_password_123',
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('bcrypt_sha256$$2b$05$'))
+        self.assertTrue(user.check_password('strong_password_123'))
+
+
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        local_store.clear()
+        stats.clear()
+        self.addCleanup(local_store.clear)
+        User.objects.create_user(email='victim@example.com', username='victim', password='strong_password_123',
+                                 verification_code='12345')
+
+    def verify(self, email, code='00000'):
+        return self.client.post(reverse('verify'), {'email': email, 'verification_code': code}, format='json')
+
+    def test_email_bucket_stops_code_guessing(self):
+        for _ in range(5):
+            self.assertEqual(self.verify('victim@example.com').status_code, status.HTTP_400_BAD_REQUEST)
+        rejected = self.verify('Victim@example.com ', '12345')
+        self.assertEqual(rejected.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(rejected['Retry-After']), 0)
+        # Другой адрес с того же IP проходит: ведро по IP ещё не пусто
+        self.assertEqual(self.verify('other@example.com').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(stats.as_dict()['verify'], {'allowed': 6, 'rejected_ip': 0, 'rejected_email': 1})
+
+    def test_ip_bucket_and_stats_endpoint(self):
+        rates = {**settings.THROTTLE_BUCKETS['RATES'], 'login_ip': '2/min'}
+        with override_settings(THROTTLE_BUCKETS={**settings.THROTTLE_BUCKETS, 'RATES': rates}):
+            codes = [
+                self.client.post(reverse('login'), {'email': f'user{pos}@example.com', 'password': 'x' * 10},
+                                 format='json').status_code
+                for pos in range(3)
+            ]
+        self.assertEqual(codes[2], status.HTTP_429_TOO_MANY_REQUESTS)
+
+        admin = User.objects.create_user(email='root@example.com', username='root', password='x', role='admin')
+        self.client.force_authenticate(admin)
+        self.assertEqual(self.client.get(reverse('throttle-stats')).data['login'],
+                         {'allowed': 2, 'rejected_ip': 1, 'rejected_email': 0})
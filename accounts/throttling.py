@@ -0,0 +1,180 @@
+"""
+Ограничение частоты для эндпоинтов авторизации: token bucket на IP и на e‑mail.
+Ведро ёмкостью N пополняется на N токенов за период ("5/min"), запрос забирает один токен.
+Хранилище — словарь процесса (O(1) на проверку) или общий кэш из CACHES
+(THROTTLE_BUCKETS['BACKEND']), если воркеров несколько.
+"""
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+import threading
+import time
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'5/min' → (ёмкость 5, пополнение в токенах за секунду)."""
+    count, period = rate.split('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period]
+
+
+def refill(state, capacity, rate, now):
+    tokens, updated_at = state if state is not None else (capacity, now)
+    return min(capacity, tokens + (now - updated_at) * rate)
+
+
+class LocalBucketStore:
+    """Вёдра в памяти процесса; при переполнении вытесняется давно не трогавшееся ведро (оно снова полное)."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        """Забирает токен. Возвращает (разрешено, секунд до следующего токена)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens = refill(self._buckets.get(key), capacity, rate, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SharedBucketStore:
+    """
+    Вёдра в общем кэше: get + set без блокировки, при гонке двух воркеров один токен
+    может списаться дважды или не списаться — для ограничения частоты это допустимо.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def take(self, key, capacity, rate):
+        now = time.time()
+        key = f"throttle:bucket:{key}"
+        tokens = refill(self.cache.get(key), capacity, rate, now)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Ведро, которое успело бы наполниться, хранить незачем
+        self.cache.set(key, (tokens, now), timeout=int(capacity / rate) + 1)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        pass
+
+
+class ThrottleStats:
+    """Счётчики пропущенных и отклонённых запросов по scope; с общим кэшем — суммарно по всем процессам."""
+
+    KINDS = ('allowed', 'rejected_ip', 'rejected_email')
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, scope, kind):
+        shared = _shared_cache()
+        if shared is not None:
+            key = f"throttle:stats:{scope}:{kind}"
+            if not shared.add(key, 1, timeout=None):
+                shared.incr(key)
+            return
+        with self._lock:
+            counts = self._counts.setdefault(scope, dict.fromkeys(self.KINDS, 0))
+            counts[kind] += 1
+
+    def as_dict(self):
+        shared = _shared_cache()
+        if shared is not None:
+            scopes = {scope.rsplit('_', 1)[0] for scope in settings.THROTTLE_BUCKETS['RATES']}
+            keys = {f"throttle:stats:{scope}:{kind}": (scope, kind) for scope in scopes for kind in self.KINDS}
+            found = shared.get_many(list(keys))
+            result = {scope: dict.fromkeys(self.KINDS, 0) for scope in sorted(scopes)}
+            for key, value in found.items():
+                scope, kind = keys[key]
+                result[scope][kind] = value
+            return result
+        with self._lock:
+            return {scope: dict(counts) for scope, counts in sorted(self._counts.items())}
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+def _shared_cache():
+    alias = settings.THROTTLE_BUCKETS.get('BACKEND')
+    return caches[alias] if alias else None
+
+
+local_store = LocalBucketStore(settings.THROTTLE_BUCKETS['MAXSIZE'])
+stats = ThrottleStats()
+
+
+def get_store():
+    shared = _shared_cache()
+    return SharedBucketStore(shared) if shared is not None else local_store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF‑throttle с двумя вёдрами: по IP (scope_ip) и по e‑mail из тела запроса (scope_email).
+    Ставки — THROTTLE_BUCKETS['RATES'].
+    """
+    scope = None
+
+    def allow_request(self, request, view):
+        rates = settings.THROTTLE_BUCKETS['RATES']
+        store = get_store()
+        self.retry_after = 0
+        checks = [('ip', self.get_ident(request))]
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if isinstance(email, str) and email.strip():
+            checks.append(('email', email.strip().lower()))
+
+        for kind, ident in checks:
+            capacity, rate = parse_rate(rates[f"{self.scope}_{kind}"])
+            allowed, wait = store.take(f"{self.scope}:{kind}:{ident}", capacity, rate)
+            if not allowed:
+                self.retry_after = wait
+                stats.record(self.scope, f"rejected_{kind}")
+                return False
+        stats.record(self.scope, 'allowed')
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginThrottle(TokenBucketThrottle):
+    scope = 'login'
+
+
+class VerifyThrottle(TokenBucketThrottle):
+    scope = 'verify'
+
+
+class ResendThrottle(TokenBucketThrottle):
+    scope = 'resend'
+
+
+class ForgotPasswordThrottle(TokenBucketThrottle):
+    scope = 'forgot_password'
+
+
+class ResetPasswordThrottle(TokenBucketThrottle):
+    scope = 'reset_password'
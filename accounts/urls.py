@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RegisterView, VerifyView, LoginView, ResendVerificationView, ForgotPasswordView, ResetPasswordView
+from .views import RegisterView, VerifyView, LoginView, ResendVerificationView, ForgotPasswordView, ResetPasswordView, ThrottleStatsView
 
 urlpatterns = [
     path('register', RegisterView.as_view(), name='register'),
@@ -8,4 +8,5 @@ urlpatterns = [
     path('resend', ResendVerificationView.as_view(), name='resend-verification'),
     path('forgot-password', ForgotPasswordView.as_view(), name='forgot-password'),
     path('reset-password', ResetPasswordView.as_view(), name='reset-password'),
+    path('throttle-stats', ThrottleStatsView.as_view(), name='throttle-stats'),
 ]
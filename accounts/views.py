@@ -1,11 +1,16 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from .serializers import RegisterSerializer, VerifySerializer, LoginSerializer
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import tokens_for
 from .models import User
-from django.core.mail import send_mail
+from .mail import queue_mail
+from .permissions import IsAdmin
+from .throttling import (
+    LoginThrottle, VerifyThrottle, ResendThrottle, ForgotPasswordThrottle, ResetPasswordThrottle, stats,
+)
 import random
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -21,17 +26,17 @@ class RegisterView(APIView):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            send_mail(
+            queue_mail(
                 subject='Email Verification',
                 message=f'Your verification code: {user.verification_code}',
-                from_email='nurmeksdu@gmail.com',
                 recipient_list=[user.email],
-                fail_silently=False,
             )
             return Response({"message": "Registration successful, verification email sent"}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class VerifyView(APIView):
+    throttle_classes = [VerifyThrottle]
+
     @swagger_auto_schema(
         tags=["Auth"],
         operation_summary="Подтверждение e‑mail",
@@ -54,6 +59,8 @@ class VerifyView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LoginView(APIView):
+    throttle_classes = [LoginThrottle]
+
     @swagger_auto_schema(
         tags=["Auth"],
         operation_summary="JWT‑авторизация",
@@ -68,7 +75,7 @@ class LoginView(APIView):
             user = authenticate(request, email=email, password=password)
             if user is not None:
                 if user.is_verified:
-                    refresh = RefreshToken.for_user(user)
+                    refresh = tokens_for(user)
                     return Response({"token": str(refresh.access_token)})
                 else:
                     return Response({"error": "Email not verified"}, status=status.HTTP_400_BAD_REQUEST)
@@ -77,6 +84,8 @@ class LoginView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class ResendVerificationView(APIView):
+    throttle_classes = [ResendThrottle]
+
     @swagger_auto_schema(
         tags=["Auth"],
         operation_summary="Повторная отправка кода",
@@ -98,16 +107,16 @@ class ResendVerificationView(APIView):
             return Response({"message": "Email already verified"}, status=status.HTTP_400_BAD_REQUEST)
         user.verification_code = str(random.randint(10000, 99999))
         user.save()
-        send_mail(
+        queue_mail(
             subject='Resend Email Verification',
             message=f'Your new verification code: {user.verification_code}',
-            from_email='maxssatul2007@gmail.com',
             recipient_list=[user.email],
-            fail_silently=False,
         )
         return Response({"message": "Verification email resent"}, status=status.HTTP_200_OK)
 
 class ForgotPasswordView(APIView):
+    throttle_classes = [ForgotPasswordThrottle]
+
     @swagger_auto_schema(
         tags=["Auth"],
         operation_summary="Запрос кода сброса пароля",
@@ -128,16 +137,16 @@ class ForgotPasswordView(APIView):
         reset_code = str(random.randint(10000, 99999))
         user.verification_code = reset_code
         user.save()
-        send_mail(
+        queue_mail(
             subject='Password Reset Code',
             message=f'Your password reset code: {reset_code}',
-            from_email='maxsatul2007@gmail.com',
             recipient_list=[user.email],
-            fail_silently=False,
         )
         return Response({"message": "Password reset code sent"}, status=status.HTTP_200_OK)
 
 class ResetPasswordView(APIView):
+    throttle_classes = [ResetPasswordThrottle]
+
     @swagger_auto_schema(
         tags=["Auth"],
         operation_summary="Сброс пароля",
@@ -167,3 +176,16 @@ class ResetPasswordView(APIView):
         user.verification_code = ''
         user.save()
         return Response({"message": "Password reset successful"}, status=status.HTTP_200_OK)
+
+
+class ThrottleStatsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    @swagger_auto_schema(
+        security=[{"Bearer": []}],
+        tags=["Auth"],
+        operation_summary="Счётчики ограничения частоты",
+        operation_description="По каждому scope: пропущено, отклонено по IP, отклонено по e‑mail.",
+    )
+    def get(self, request):
+        return Response(stats.as_dict(), status=status.HTTP_200_OK)
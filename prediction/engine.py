@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.db.models import Sum, F, Q
+from django.utils import timezone
+from datetime import timedelta
+from .forecasting import get_forecaster, build_daily_matrix
+
+HISTORY_DAYS = 30
+FORECAST_DAYS = 7
+STOCK_STATUSES = ["warehouse", "showcase"]
+
+
+def _category_forecast(current_stock, historical_sales, forecast_revenue, forecast_next_week=None):
+    avg_daily_sales = historical_sales / HISTORY_DAYS if historical_sales else 0
+    if forecast_next_week is None:
+        forecast_next_week = avg_daily_sales * FORECAST_DAYS
+    return {
+        "current_stock": current_stock,
+        "historical_sales": historical_sales,
+        "average_daily_sales": avg_daily_sales,
+        "forecast_next_week": forecast_next_week,
+        "recommended_order": max(0, int(forecast_next_week - current_stock)),
+        "forecast_revenue": float(forecast_revenue),
+    }
+
+
+def compute_forecast_legacy():
+    """
+    Прежний алгоритм: три агрегата на каждую категорию, продажи — по sold‑строкам StoreItem.
+    Оставлен для сравнения в bench_forecast.
+    """
+    from store.models import StoreItem
+    categories = StoreItem.objects.exclude(category__isnull=True).values_list('category', flat=True).distinct()
+    start_date = timezone.now().date() - timedelta(days=HISTORY_DAYS)
+    results = {}
+    for cat in categories:
+        current_stock = StoreItem.objects.filter(
+            category=cat, status__in=STOCK_STATUSES
+        ).aggregate(total=Sum('quantity'))['total'] or 0
+        sold_items = StoreItem.objects.filter(category=cat, status='sold', added_at__date__gte=start_date)
+        historical_sales = sold_items.aggregate(total=Sum('quantity'))['total'] or 0
+        forecast_revenue = sold_items.aggregate(total=Sum(F('price') * F('quantity')))['total'] or 0
+        results[cat] = _category_forecast(current_stock, historical_sales, forecast_revenue)
+    return results
+
+
+def compute_forecast(categories=None, model=None):
+    """
+    Прогноз по категориям за два запроса: остатки — одним GROUP BY по StoreItem,
+    продажи и выручка за HISTORY_DAYS — по дневной свёртке DailySales (дни, а не события).
+    categories ограничивает расчёт шардом (см. prediction.parallel), по умолчанию — все.
+    """
+    from store.models import StoreItem, DailySales
+    start_date = timezone.now().date() - timedelta(days=HISTORY_DAYS)
+    shard = Q(category__in=categories) if categories is not None else Q()
+    stock = (
+        StoreItem.objects.exclude(category__isnull=True)
+        .filter(shard)
+        .values('category')
+        .annotate(current_stock=Sum('quantity', filter=Q(status__in=STOCK_STATUSES)))
+        .order_by('category')
+    )
+    sales = {
+        row['category']: row
+        for row in DailySales.objects.filter(shard, category__isnull=False, date__gte=start_date)
+        .values('category')
+        .annotate(historical_sales=Sum('quantity'), forecast_revenue=Sum('revenue'))
+        .order_by()
+    }
+    model_forecasts = model_forecast_next_week(model or settings.FORECAST['MODEL'], categories)
+    results = {}
+    for row in stock:
+        sold = sales.pop(row['category'], {})
+        results[row['category']] = _category_forecast(
+            row['current_stock'] or 0, sold.get('historical_sales') or 0, sold.get('forecast_revenue') or 0,
+            model_forecasts.get(row['category'], 0) if model_forecasts is not None else None,
+        )
+    # Категории, товары которых уже удалены из StoreItem, но продажи за окно есть
+    for category, sold in sales.items():
+        results[category] = _category_forecast(
+            0, sold['historical_sales'] or 0, sold['forecast_revenue'] or 0,
+            model_forecasts.get(category, 0) if model_forecasts is not None else None,
+        )
+    return results
+
+
+def model_forecast_next_week(model, categories=None):
+    """
+    Прогноз продаж на FORECAST_DAYS по категориям моделью из prediction.forecasting.
+    Для 'mean' возвращает None: прогноз считается прежней формулой без лишнего запроса.
+    """
+    forecaster = get_forecaster(model)
+    if model == 'mean':
+        return None
+    days = settings.FORECAST['HISTORY_DAYS']
+    # Окно заканчивается сегодняшним днём, как и 30‑дневное окно продаж
+    start_date = timezone.now().date() - timedelta(days=days - 1)
+    keys, matrix = build_daily_matrix(start_date, days, keys=categories)
+    totals = forecaster(matrix, FORECAST_DAYS).sum(axis=1) if keys else []
+    return {category: float(total) for category, total in zip(keys, totals)}
@@ -0,0 +1,113 @@
+"""
+Модели спроса для прогноза. Каждая принимает матрицу дневных продаж Y формы
+(число рядов, число дней) и горизонт h, возвращает матрицу прогноза (число рядов, h).
+Все ряды считаются одновременно: цикл идёт только по дням истории, а не по рядам.
+"""
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+SEASON = 7
+
+
+def mean_forecast(Y, horizon, window=30):
+    """Среднее за последние window дней — прежний прогноз."""
+    Y = np.asarray(Y, dtype=float)
+    level = Y[:, -window:].sum(axis=1) / window
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def ses_forecast(Y, horizon, alpha=0.3):
+    """Простое экспоненциальное сглаживание."""
+    Y = np.asarray(Y, dtype=float)
+    level = Y[:, 0].copy()
+    for t in range(1, Y.shape[1]):
+        level += alpha * (Y[:, t] - level)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def holt_winters_forecast(Y, horizon, alpha=0.3, beta=0.05, gamma=0.2, season=SEASON):
+    """Аддитивный Холт–Винтерс с недельной сезонностью; прогноз не уходит ниже нуля."""
+    Y = np.asarray(Y, dtype=float)
+    n, days = Y.shape
+    if days < 2 * season:
+        return ses_forecast(Y, horizon, alpha)
+
+    first, second = Y[:, :season], Y[:, season:2 * season]
+    level = first.mean(axis=1)
+    trend = (second.mean(axis=1) - level) / season
+    seasonal = first - level[:, None]
+
+    for t in range(season, days):
+        idx = t % season
+        previous_level = level
+        level = alpha * (Y[:, t] - seasonal[:, idx]) + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+        seasonal[:, idx] = gamma * (Y[:, t] - level) + (1 - gamma) * seasonal[:, idx]
+
+    steps = np.arange(1, horizon + 1)
+    season_idx = (days + steps - 1) % season
+    forecast = level[:, None] + trend[:, None] * steps[None, :] + seasonal[:, season_idx]
+    return np.clip(forecast, 0, None)
+
+
+def croston_forecast(Y, horizon, alpha=0.1):
+    """Метод Кростона для прерывистого спроса: размер продажи / интервал между продажами."""
+    Y = np.asarray(Y, dtype=float)
+    n, days = Y.shape
+    demand = Y > 0
+    counts = demand.sum(axis=1)
+    has_sales = counts > 0
+    # Начальные оценки: средний ненулевой спрос и средний интервал по всей истории
+    size = np.where(has_sales, Y.sum(axis=1) / np.maximum(counts, 1), 0.0)
+    interval = np.where(has_sales, days / np.maximum(counts, 1), 1.0)
+    since_last = np.ones(n)
+
+    for t in range(days):
+        hit = demand[:, t]
+        size = np.where(hit, size + alpha * (Y[:, t] - size), size)
+        interval = np.where(hit, interval + alpha * (since_last - interval), interval)
+        since_last = np.where(hit, 1.0, since_last + 1)
+
+    rate = np.where(has_sales, size / interval, 0.0)
+    return np.repeat(rate[:, None], horizon, axis=1)
+
+
+FORECASTERS = {
+    'mean': mean_forecast,
+    'ses': ses_forecast,
+    'holt_winters': holt_winters_forecast,
+    'croston': croston_forecast,
+}
+
+
+def get_forecaster(name):
+    try:
+        return FORECASTERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown forecast model: {name}. Available: {', '.join(FORECASTERS)}")
+
+
+def build_daily_matrix(start_date, days, key='category', keys=None):
+    """
+    Матрица дневных продаж из DailySales одним запросом: ряды — значения key
+    (category или barcode), столбцы — дни начиная с start_date. keys ограничивает выборку
+    этими значениями. Возвращает (ключи, матрица).
+    """
+    from store.models import DailySales
+    lookup = {f'{key}__in': keys} if keys is not None else {f'{key}__isnull': False}
+    rows = list(
+        DailySales.objects.filter(
+            **lookup,
+            date__gte=start_date,
+            date__lt=start_date + timedelta(days=days),
+        ).values_list(key, 'date', 'quantity')
+    )
+    if not rows:
+        return [], np.zeros((0, days))
+    keys, dates, quantities = zip(*rows)
+    codes, uniques = pd.factorize(np.array(keys, dtype=object))
+    offsets = np.fromiter((day.toordinal() for day in dates), dtype=np.int64, count=len(dates)) - start_date.toordinal()
+    matrix = np.zeros((len(uniques), days))
+    np.add.at(matrix, (codes, offsets), np.asarray(quantities, dtype=float))
+    return list(uniques), matrix
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import timedelta
+import numpy as np
+import time
+from prediction.forecasting import FORECASTERS, SEASON, build_daily_matrix
+
+
+def synthetic_matrix(series, days, seed=0):
+    """Смесь гладких рядов с недельной сезонностью и прерывистого спроса."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+    base = rng.gamma(2.0, 5.0, size=(series, 1))
+    weekly = 1 + 0.3 * np.sin(2 * np.pi * (t[None, :] + rng.integers(0, SEASON, size=(series, 1))) / SEASON)
+    trend = 1 + rng.normal(0, 0.002, size=(series, 1)) * t[None, :]
+    smooth = rng.poisson(np.clip(base * weekly * trend, 0, None))
+    intermittent = rng.poisson(rng.gamma(1.0, 3.0, size=(series, days))) * (rng.random((series, days)) < 0.15)
+    return np.where(rng.random((series, 1)) < 0.7, smooth, intermittent).astype(float)
+
+
+def mape(actual, forecast):
+    mask = actual > 0
+    if not mask.any():
+        return float('nan')
+    return float(np.mean(np.abs(actual[mask] - forecast[mask]) / actual[mask]) * 100)
+
+
+def mase(train, actual, forecast):
+    # Масштаб — ошибка сезонного наивного прогноза (y[t] = y[t-7]) на обучающей части
+    scale = np.abs(train[:, SEASON:] - train[:, :-SEASON]).mean(axis=1)
+    mask = scale > 0
+    if not mask.any():
+        return float('nan')
+    errors = np.abs(actual - forecast).mean(axis=1)
+    return float(np.mean(errors[mask] / scale[mask]))
+
+
+class Command(BaseCommand):
+    help = (
+        'Rolling-origin backtest of the forecast models: MAPE, MASE and fit time per 10k series. '
+        'Runs on DailySales per barcode, or on synthetic series with --synthetic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', default=','.join(FORECASTERS), help='comma-separated model names')
+        parser.add_argument('--horizon', type=int, default=7)
+        parser.add_argument('--origins', type=int, default=4, help='number of rolling origins')
+        parser.add_argument('--days', type=int, default=None, help='history length (default FORECAST HISTORY_DAYS)')
+        parser.add_argument('--synthetic', type=int, default=0, metavar='SERIES',
+                            help='backtest on this many synthetic series instead of DailySales')
+
+    def load(self, options):
+        days = options['days'] or settings.FORECAST['HISTORY_DAYS']
+        if options['synthetic']:
+            return synthetic_matrix(options['synthetic'], days)
+        start_date = timezone.now().date() - timedelta(days=days - 1)
+        _, matrix = build_daily_matrix(start_date, days, key='barcode')
+        return matrix
+
+    def handle(self, *args, **options):
+        models = [name.strip() for name in options['models'].split(',') if name.strip()]
+        unknown = [name for name in models if name not in FORECASTERS]
+        if unknown:
+            raise CommandError(f"Unknown models: {', '.join(unknown)}")
+
+        matrix = self.load(options)
+        horizon, origins = options['horizon'], options['origins']
+        series, days = matrix.shape
+        if series == 0:
+            raise CommandError('No sales history to backtest')
+        if days - horizon * origins < 2 * SEASON:
+            raise CommandError('History is too short for this horizon and number of origins')
+        self.stdout.write(f"{series:,} series x {days} days, horizon {horizon}, {origins} origins")
+
+        for name in models:
+            forecaster = FORECASTERS[name]
+            mapes, mases, elapsed = [], [], 0.0
+            for origin in range(origins, 0, -1):
+                cut = days - origin * horizon
+                train, actual = matrix[:, :cut], matrix[:, cut:cut + horizon]
+                started = time.perf_counter()
+                forecast = forecaster(train, horizon)
+                elapsed += time.perf_counter() - started
+                mapes.append(mape(actual, forecast))
+                mases.append(mase(train, actual, forecast))
+            per_10k = elapsed / origins / series * 10_000
+            self.stdout.write(
+                f"{name:>13}:  MAPE {np.nanmean(mapes):7.1f}%   MASE {np.nanmean(mases):6.3f}   "
+                f"fit {per_10k * 1000:8.1f} ms / 10k series"
+            )
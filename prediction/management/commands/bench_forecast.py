@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import time
+from prediction.engine import compute_forecast, compute_forecast_legacy
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the per-category (legacy) and the set-based forecast engines on synthetic data: '
+        'wall time, query count and output parity. Seeded rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000)
+        parser.add_argument('--categories', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def seed(self, rows, categories):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO store_storeitem
+                    (name, category, quantity, price, expire_date, status, is_expired, barcode, added_at)
+                SELECT
+                    'Item ' || g,
+                    'cat-' || (g %% %(categories)s),
+                    1 + g %% 50,
+                    (g %% 10000) / 100.0,
+                    CURRENT_DATE + (g %% 400) - 30,
+                    CASE
+                        WHEN g %% 10 < 3 THEN 'warehouse'
+                        WHEN g %% 10 < 5 THEN 'showcase'
+                        WHEN g %% 10 < 9 THEN 'sold'
+                        ELSE 'deleted'
+                    END,
+                    false,
+                    'fbench' || g,
+                    now() - make_interval(days => g %% 90)
+                FROM generate_series(1, %(rows)s) AS g
+                """,
+                {'rows': rows, 'categories': categories},
+            )
+            # Новый движок читает продажи из дневной свёртки: строим её из тех же sold‑строк,
+            # как это делает миграция store 0007, чтобы результаты были сравнимы
+            cursor.execute(
+                """
+                INSERT INTO store_dailysales (date, category, barcode, quantity, revenue)
+                SELECT (added_at AT TIME ZONE %s)::date, category, barcode,
+                       SUM(quantity), COALESCE(SUM(price * quantity), 0)
+                FROM store_storeitem
+                WHERE status = 'sold' AND barcode LIKE 'fbench%%'
+                GROUP BY 1, 2, 3
+                """,
+                [timezone.get_current_timezone_name()],
+            )
+            cursor.execute('ANALYZE store_storeitem')
+            cursor.execute('ANALYZE store_dailysales')
+
+    def measure(self, engine, repeat):
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                result = engine()
+                timings.append(time.perf_counter() - started)
+        return result, min(timings), len(queries)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Seeding {options['rows']:,} rows in {options['categories']:,} categories...")
+                self.seed(options['rows'], options['categories'])
+                legacy, legacy_time, legacy_queries = self.measure(compute_forecast_legacy, options['repeat'])
+                current, current_time, current_queries = self.measure(compute_forecast, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(f"legacy engine:     {legacy_time * 1000:10.1f} ms  {legacy_queries:6} queries")
+        self.stdout.write(f"set-based engine:  {current_time * 1000:10.1f} ms  {current_queries:6} queries")
+        self.stdout.write(f"speedup:           x{legacy_time / max(current_time, 1e-6):.1f}")
+        if legacy == current:
+            self.stdout.write(self.style.SUCCESS(f"parity: identical output for {len(current)} categories"))
+        else:
+            diff = sorted(cat for cat in legacy.keys() | current.keys() if legacy.get(cat) != current.get(cat))
+            self.stdout.write(self.style.ERROR(f"parity: {len(diff)} categories differ, e.g. {diff[:5]}"))
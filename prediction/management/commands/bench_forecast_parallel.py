@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+import time
+from prediction.parallel import compute_forecast_sharded, forecast_categories, make_shards
+
+SEED_PREFIX = 'pbench-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Wall-clock comparison of the serial and the process-pool sharded forecast. '
+        'Child processes need committed data: --seed inserts synthetic rows and deletes them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, metavar='CATEGORIES',
+                            help='seed this many categories with a daily sales history')
+        parser.add_argument('--model', default=None, help='forecast model (default FORECAST MODEL)')
+        parser.add_argument('--shard-size', type=int, default=None)
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def seed(self, categories):
+        days = settings.FORECAST['HISTORY_DAYS']
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO store_storeitem
+                    (name, category, quantity, price, expire_date, status, is_expired, barcode, added_at)
+                SELECT 'Item ' || c, %(prefix)s || c, 1 + c %% 50, 1.00, CURRENT_DATE + 30,
+                       'warehouse', false, %(prefix)s || c, now()
+                FROM generate_series(1, %(categories)s) AS c
+                """,
+                {'prefix': SEED_PREFIX, 'categories': categories},
+            )
+            cursor.execute(
+                """
+                INSERT INTO store_dailysales (date, category, barcode, quantity, revenue)
+                SELECT %(today)s::date - d, %(prefix)s || c, %(prefix)s || c,
+                       (c + d * 7) %% 13, ((c + d * 7) %% 13) * 1.00
+                FROM generate_series(1, %(categories)s) AS c, generate_series(0, %(days)s - 1) AS d
+                """,
+                {'prefix': SEED_PREFIX, 'categories': categories, 'days': days, 'today': timezone.now().date()},
+            )
+
+    def cleanup(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM store_dailysales WHERE category LIKE %s", [SEED_PREFIX + '%'])
+            cursor.execute("DELETE FROM store_storeitem WHERE category LIKE %s", [SEED_PREFIX + '%'])
+
+    def measure(self, repeat, **kwargs):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = compute_forecast_sharded(model=self.model, **kwargs)
+            timings.append(time.perf_counter() - started)
+        return result, min(timings)
+
+    def handle(self, *args, **options):
+        self.model = options['model']
+        workers = options['workers'] or settings.FORECAST['WORKERS']
+        if options['seed']:
+            self.stdout.write(f"Seeding {options['seed']:,} categories...")
+            self.seed(options['seed'])
+        try:
+            shards = make_shards(forecast_categories(), options['shard_size'])
+            self.stdout.write(
+                f"{sum(map(len, shards)):,} categories in {len(shards)} shards, "
+                f"model {self.model or settings.FORECAST['MODEL']}, {workers} workers"
+            )
+            serial, serial_time = self.measure(options['repeat'], backend='serial', shard_size=options['shard_size'])
+            pooled, pooled_time = self.measure(
+                options['repeat'], backend='process', shard_size=options['shard_size'], workers=workers,
+            )
+        finally:
+            if options['seed']:
+                self.cleanup()
+
+        self.stdout.write(f"serial:        {serial_time * 1000:10.1f} ms")
+        self.stdout.write(f"process pool:  {pooled_time * 1000:10.1f} ms")
+        self.stdout.write(f"speedup:       x{serial_time / max(pooled_time, 1e-6):.2f}")
+        if serial == pooled:
+            self.stdout.write(self.style.SUCCESS("parity: identical output"))
+        else:
+            self.stdout.write(self.style.ERROR("parity: outputs differ"))
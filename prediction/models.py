@@ -1,3 +1,14 @@
 from django.db import models
 
-# Create your models here.
+
+class ForecastSnapshot(models.Model):
+    """Готовый результат прогноза; id служит версией, etag — хэшем содержимого."""
+    payload = models.JSONField()
+    etag = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        get_latest_by = ('created_at', 'id')
+
+    def __str__(self):
+        return f"Forecast v{self.id} ({self.created_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,78 @@
+"""
+Параллельный расчёт прогноза: категории делятся на шарды, шарды считаются
+в пуле процессов или группой Celery‑задач, результаты сливаются в один словарь.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from datetime import timedelta
+import logging
+import multiprocessing
+from .engine import compute_forecast, HISTORY_DAYS
+
+logger = logging.getLogger(__name__)
+
+
+def forecast_categories():
+    """Все категории, которые попадут в прогноз: из StoreItem и из продаж за окно."""
+    from store.models import StoreItem, DailySales
+    start_date = timezone.now().date() - timedelta(days=HISTORY_DAYS)
+    with_items = StoreItem.objects.exclude(category__isnull=True).values_list('category')
+    with_sales = DailySales.objects.filter(category__isnull=False, date__gte=start_date).values_list('category')
+    return sorted(category for (category,) in with_items.union(with_sales))
+
+
+def make_shards(categories, shard_size=None):
+    shard_size = shard_size or settings.FORECAST['SHARD_SIZE']
+    return [categories[pos:pos + shard_size] for pos in range(0, len(categories), shard_size)]
+
+
+def merge_shards(results):
+    merged = {}
+    for shard in results:
+        merged.update(shard)
+    return merged
+
+
+def forecast_shard(categories, model=None):
+    return compute_forecast(categories, model)
+
+
+def _close_connections():
+    # Соединение с БД нельзя делить между процессами: каждый процесс пула откроет своё
+    connections.close_all()
+
+
+def compute_forecast_sharded(backend=None, shard_size=None, workers=None, model=None):
+    """
+    Прогноз по всем категориям шардами. backend 'serial' считает шарды по очереди,
+    'process' — в ProcessPoolExecutor из workers процессов. Для 'celery' см. forecast_chord.
+    """
+    backend = backend or settings.FORECAST['BACKEND']
+    workers = workers or settings.FORECAST['WORKERS']
+    if backend not in ('serial', 'process'):
+        raise ValueError(f"Unsupported forecast backend for inline computation: {backend}")
+
+    shards = make_shards(forecast_categories(), shard_size)
+    if backend == 'process' and multiprocessing.current_process().daemon:
+        # Процессы prefork‑воркера Celery — демоны и не могут порождать дочерние
+        logger.warning("Forecast process pool is unavailable in a daemon process, computing serially")
+        backend = 'serial'
+    if backend == 'serial' or len(shards) <= 1 or workers <= 1:
+        return merge_shards(forecast_shard(shard, model) for shard in shards)
+
+    _close_connections()
+    # fork: дочерние процессы наследуют настроенный Django и не импортируют проект заново
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_close_connections) as pool:
+        return merge_shards(pool.map(forecast_shard, shards, [model] * len(shards)))
+
+
+def forecast_chord(callback, shard_size=None, model=None):
+    """Запускает шарды группой Celery‑задач; callback получает список результатов шардов."""
+    from celery import chord
+    from .forecast_tasks import forecast_shard_task
+    shards = make_shards(forecast_categories(), shard_size)
+    chord(forecast_shard_task.s(shard, model) for shard in shards)(callback)
+    return len(shards)
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+import hashlib
+import json
+from store.sales import compact_all_sales
+from .parallel import compute_forecast_sharded
+from .models import ForecastSnapshot
+
+CACHE_KEY = "prediction:forecast:latest"
+
+
+def _cache():
+    return caches[settings.FORECAST_SNAPSHOT['CACHE']]
+
+
+def _etag(payload):
+    raw = json.dumps(payload, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def _entry(snapshot):
+    return {
+        "version": snapshot.id,
+        "etag": snapshot.etag,
+        "created_at": snapshot.created_at,
+        "payload": snapshot.payload,
+    }
+
+
+def write_snapshot(payload=None):
+    """
+    Сохраняет новую версию прогноза и обновляет кэш; старые версии сверх KEEP удаляются.
+    Без payload сначала сворачивает свежие продажи и считает прогноз шардами
+    (при BACKEND 'celery' — здесь же, последовательно: ждать chord в запросе нельзя).
+    """
+    if payload is None:
+        compact_all_sales()
+        payload = compute_forecast_sharded(
+            backend='serial' if settings.FORECAST['BACKEND'] == 'celery' else None
+        )
+    snapshot = ForecastSnapshot.objects.create(payload=payload, etag=_etag(payload))
+    stale = ForecastSnapshot.objects.order_by('-created_at', '-id').values_list('id', flat=True)[
+        settings.FORECAST_SNAPSHOT['KEEP']:
+    ]
+    ForecastSnapshot.objects.filter(id__in=list(stale)).delete()
+    entry = _entry(snapshot)
+    _cache().set(CACHE_KEY, entry, timeout=settings.FORECAST_SNAPSHOT['CACHE_TTL'])
+    return entry
+
+
+def latest_snapshot():
+    """Последний снимок: из кэша, иначе одна выборка из БД. None — если снимков ещё нет."""
+    entry = _cache().get(CACHE_KEY)
+    if entry is not None:
+        return entry
+    snapshot = ForecastSnapshot.objects.order_by('-created_at', '-id').first()
+    if snapshot is None:
+        return None
+    entry = _entry(snapshot)
+    _cache().set(CACHE_KEY, entry, timeout=settings.FORECAST_SNAPSHOT['CACHE_TTL'])
+    return entry
@@ -1,3 +1,146 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from unittest import mock
+from accounts.models import User
+from datetime import date, timedelta
+from decimal import Decimal
+import numpy as np
+from store.models import StoreItem, DailySales
+from store.sales import compact_all_sales
+from store.services import sell
+from .engine import compute_forecast, compute_forecast_legacy
+from .forecast_tasks import refresh_forecast_snapshot
+from .forecasting import FORECASTERS, croston_forecast, get_forecaster
+from .models import ForecastSnapshot
+from .parallel import compute_forecast_sharded
 
-# Create your tests here.
+
+class ForecastEngineTests(TestCase):
+    def setUp(self):
+        rows = [
+            ('Dairy', 'warehouse', 10, Decimal('1.50'), 0),
+            ('Dairy', 'showcase', 45, Decimal('1.50'), 40),
+            ('Dairy', 'showcase', 3, None, 3),
+            ('Bakery', 'showcase', 300, Decimal('0.99'), 300),
+            ('Bakery', 'deleted', 7, Decimal('0.99'), 0),
+            ('Frozen', 'warehouse', 12, Decimal('4.00'), 0),
+            (None, 'showcase', 1, Decimal('1.00'), 1),
+        ]
+        for category, status, quantity, price, sold in rows:
+            item = StoreItem.objects.create(
+                name='Item', category=category, quantity=quantity, price=price,
+                expire_date=date(2030, 1, 1), status=status,
+            )
+            if sold:
+                sell(item.id, sold)
+        # Продажа за пределами 30‑дневного окна
+        DailySales.objects.create(
+            date=timezone.now().date() - timedelta(days=45), category='Frozen', barcode='old',
+            quantity=50, revenue=Decimal('200.00'),
+        )
+        compact_all_sales()
+
+    def test_rollup_engine_matches_legacy(self):
+        with self.assertNumQueries(2):
+            result = compute_forecast()
+        self.assertEqual(result, compute_forecast_legacy())
+        self.assertEqual(set(result), {'Dairy', 'Bakery', 'Frozen'})
+        self.assertEqual(result['Frozen']['historical_sales'], 0)
+        self.assertEqual(result['Bakery']['recommended_order'], 70)
+        self.assertEqual((result['Dairy']['current_stock'], result['Dairy']['forecast_revenue']), (15, 60.0))
+
+    @override_settings(FORECAST={'MODEL': 'croston', 'HISTORY_DAYS': 14})
+    def test_pluggable_model(self):
+        result = compute_forecast()
+        # Одна продажа 300 шт. за 14 дней истории: 300 / 14 в день
+        self.assertAlmostEqual(result['Bakery']['forecast_next_week'], 150.0)
+        self.assertEqual(result['Frozen']['forecast_next_week'], 0)
+        self.assertEqual(result['Bakery']['historical_sales'], 300)
+
+
+class ShardedForecastTests(TransactionTestCase):
+    def test_shards_match_single_pass(self):
+        for pos in range(7):
+            item = StoreItem.objects.create(
+                name='Item', category=f'cat-{pos}', quantity=10 + pos, price=Decimal('2.00'),
+                expire_date=date(2030, 1, 1), status='showcase',
+            )
+            sell(item.id, pos + 1)
+        DailySales.objects.create(date=timezone.now().date(), category='gone', barcode='x', quantity=3)
+        compact_all_sales()
+
+        expected = compute_forecast()
+        self.assertEqual(len(expected), 8)
+        self.assertEqual(compute_forecast_sharded(backend='serial', shard_size=3), expected)
+        self.assertEqual(compute_forecast_sharded(backend='process', shard_size=3, workers=2), expected)
+
+
+class ForecastingModelTests(SimpleTestCase):
+    def test_models_on_stable_and_intermittent_demand(self):
+        weekly = np.tile([5, 5, 5, 5, 5, 10, 10], 8)
+        Y = np.vstack([np.full(56, 4.0), weekly, np.zeros(56)])
+        for name, forecaster in FORECASTERS.items():
+            forecast = forecaster(Y, 7)
+            self.assertEqual(forecast.shape, (3, 7), name)
+            np.testing.assert_allclose(forecast[0], 4.0, err_msg=name)
+            np.testing.assert_allclose(forecast[2], 0.0, err_msg=name)
+        np.testing.assert_allclose(FORECASTERS['holt_winters'](Y, 7)[1], weekly[:7], atol=0.5)
+
+        intermittent = np.zeros((1, 60))
+        intermittent[0, ::5] = 10
+        np.testing.assert_allclose(croston_forecast(intermittent, 3), 2.0, rtol=0.05)
+        with self.assertRaises(ValueError):
+            get_forecaster('prophet')
+
+
+class ForecastSnapshotTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        StoreItem.objects.create(
+            name='Bread', category='Bakery', quantity=30, price=Decimal('1.00'),
+            expire_date=date(2030, 1, 1), status='sold',
+        )
+
+    def test_result_is_served_from_snapshot_with_etag(self):
+        url = reverse('forecast-result')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, compute_forecast())
+        self.assertEqual(ForecastSnapshot.objects.count(), 1)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        StoreItem.objects.create(
+            name='Cake', category='Bakery', quantity=5, price=Decimal('9.00'),
+            expire_date=date(2030, 1, 1), status='warehouse',
+        )
+        refresh_forecast_snapshot()
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(fresh.status_code, status.HTTP_200_OK)
+        self.assertEqual(fresh.data['Bakery']['current_stock'], 5)
+        self.assertNotEqual(fresh['ETag'], first['ETag'])
+
+    def test_first_result_with_celery_backend(self):
+        with self.settings(FORECAST={**settings.FORECAST, 'BACKEND': 'celery'}):
+            response = self.client.get(reverse('forecast-result'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, compute_forecast())
+
+    def test_refresh_is_queued(self):
+        user = User.objects.create_user(
+            email='planner@example.com', username='planner', password='strong_password_123', role='manager'
+        )
+        self.client.force_authenticate(user)
+        with mock.patch('prediction.views.refresh_forecast_snapshot.delay') as delay:
+            delay.return_value.id = 'task-1'
+            response = self.client.post(reverse('forecast-refresh'))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['task_id'], 'task-1')
+        delay.assert_called_once_with()
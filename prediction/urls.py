@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import ForecastResultView
+from .views import ForecastResultView, ForecastRefreshView
 
 urlpatterns = [
     path('result', ForecastResultView.as_view(), name='forecast-result'),
+    path('refresh', ForecastRefreshView.as_view(), name='forecast-refresh'),
 ]
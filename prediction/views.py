@@ -1,7 +1,12 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from prediction.forecast_tasks import forecast_by_category
+from rest_framework.permissions import IsAuthenticated
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from accounts.permissions import IsManager
+from prediction.forecast_tasks import refresh_forecast_snapshot
+from prediction.snapshots import latest_snapshot, write_snapshot
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -9,8 +14,31 @@ class ForecastResultView(APIView):
     @swagger_auto_schema(
         tags=["Forecast"],
         operation_summary="Получить прогноз продаж",
-        responses={200: openapi.Response("JSON‑результат")},
+        operation_description="Отдаёт последний посчитанный снимок. Поддерживает ETag / If-None-Match (304).",
+        responses={200: openapi.Response("JSON‑результат"), 304: "Снимок не изменился"},
     )
     def get(self, request):
-        result = forecast_by_category.apply()
-        return Response(result.result, status=status.HTTP_200_OK)
+        # Первый запрос после деплоя, пока beat ещё не записал ни одного снимка
+        snapshot = latest_snapshot() or write_snapshot()
+        etag = quote_etag(snapshot["etag"])
+        response = Response(snapshot["payload"], status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        response["X-Forecast-Version"] = str(snapshot["version"])
+        return get_conditional_response(request, etag=etag, response=response)
+
+
+class ForecastRefreshView(APIView):
+    permission_classes = [IsAuthenticated, IsManager]
+
+    @swagger_auto_schema(
+        security=[{"Bearer": []}],
+        tags=["Forecast"],
+        operation_summary="Пересчитать прогноз в фоне",
+        responses={202: openapi.Response("Задача поставлена в очередь")},
+    )
+    def post(self, request):
+        task = refresh_forecast_snapshot.delay()
+        return Response(
+            {"message": "Forecast refresh queued", "task_id": task.id},
+            status=status.HTTP_202_ACCEPTED,
+        )
@@ -1,4 +1,6 @@
 from django.contrib import admin
-from .models import StoreItem
+from .models import StoreItem, MarkdownRule, PriceChange
 
 admin.site.register(StoreItem)
+admin.site.register(MarkdownRule)
+admin.site.register(PriceChange)
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.db import connection
+import os
+import threading
+
+# Последовательность PostgreSQL с шагом в блок (INCREMENT BY, миграция 0010): nextval — начало
+# диапазона [nextval, nextval + шаг). Шаг хранится в самой последовательности, поэтому аллокаторы
+# с разным block_size и смена STORE_BARCODE_BLOCK_SIZE не дают пересекающихся диапазонов.
+SEQUENCE_NAME = 'store_barcode_block_seq'
+# Префикс 2 — диапазон EAN‑13 для внутренних кодов магазина (restricted circulation)
+PREFIX = '2'
+PAYLOAD_DIGITS = 11
+
+
+def ean13_check_digit(payload: str) -> str:
+    total = sum(int(digit) * (3 if pos % 2 else 1) for pos, digit in enumerate(payload))
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_ean13(code: str) -> bool:
+    return len(code) == 13 and code.isdigit() and ean13_check_digit(code[:12]) == code[12]
+
+
+class BarcodeAllocator:
+    """
+    Выдаёт уникальные EAN‑13 без обращений к таблице товаров.
+    Процесс резервирует не меньше block_size номеров одним запросом (nextval на каждый
+    шаг последовательности) и раздаёт их из памяти; после fork диапазон родителя не используется.
+    """
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size or settings.STORE_BARCODE_BLOCK_SIZE
+        self._lock = threading.Lock()
+        self._ranges = []
+        self._pid = None
+
+    def _reserve(self, count):
+        # Не меньше block_size номеров за раз, целыми шагами последовательности
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT nextval(%s), seq.seqincrement
+                FROM pg_sequence seq,
+                     generate_series(1, ceil(%s::numeric / seq.seqincrement)::int)
+                WHERE seq.seqrelid = %s::regclass
+                """,
+                [SEQUENCE_NAME, max(count, self.block_size), SEQUENCE_NAME],
+            )
+            for start, step in cursor.fetchall():
+                self._ranges.append([start, start + step])
+
+    def allocate(self, count=1):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._ranges = []
+                self._pid = os.getpid()
+
+            available = sum(end - start for start, end in self._ranges)
+            if available < count:
+                self._reserve(count - available)
+
+            numbers = []
+            while len(numbers) < count:
+                current = self._ranges[0]
+                take = min(count - len(numbers), current[1] - current[0])
+                numbers.extend(range(current[0], current[0] + take))
+                current[0] += take
+                if current[0] == current[1]:
+                    self._ranges.pop(0)
+
+        codes = []
+        for number in numbers:
+            payload = PREFIX + str(number).zfill(PAYLOAD_DIGITS)
+            codes.append(payload + ean13_check_digit(payload))
+        return codes
+
+
+allocator = BarcodeAllocator()
+
+
+def allocate_barcodes(count=1):
+    return allocator.allocate(count)
@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+import threading
+import time
+from .encoders import RowEncoder
+from .horizon import invalidate_horizon
+from .models import StoreItem
+
+
+class LRUCache:
+    """Локальный LRU‑кэш процесса с TTL на запись."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Локальный TTL ограничивает устаревание в других процессах: инвалидация чистит только
+# свой процесс и общий backend (STORE_SCAN_CACHE['BACKEND'], алиас из CACHES)
+scan_cache = LRUCache(settings.STORE_SCAN_CACHE['MAXSIZE'], settings.STORE_SCAN_CACHE['TTL'])
+
+
+def _shared_cache():
+    alias = settings.STORE_SCAN_CACHE.get('BACKEND')
+    return caches[alias] if alias else None
+
+
+def _shared_key(barcode):
+    return f"store:scan:{barcode}"
+
+
+def _load_showcase_items(barcodes):
+    # Если на витрине несколько строк с одним штрих‑кодом — берём первую, как ScanBarcodeView
+    encoder = RowEncoder(extra=('barcode',))
+    i_barcode = encoder.index('barcode')
+    items = StoreItem.objects.filter(barcode__in=barcodes, status="showcase").with_expiry().order_by("-id")
+    found = {}
+    for row in encoder.rows(items):
+        found[row[i_barcode]] = row
+    return {barcode: encoder.encode(row) for barcode, row in found.items()}
+
+
+def get_showcase_items(barcodes):
+    """Данные товаров на витрине по штрих‑кодам: локальный кэш → общий кэш → один запрос в БД."""
+    result = {}
+    missing = []
+    for barcode in dict.fromkeys(barcodes):
+        data = scan_cache.get(barcode)
+        if data is None:
+            missing.append(barcode)
+        else:
+            result[barcode] = data
+
+    shared = _shared_cache()
+    if missing and shared is not None:
+        hits = shared.get_many([_shared_key(barcode) for barcode in missing])
+        still_missing = []
+        for barcode in missing:
+            data = hits.get(_shared_key(barcode))
+            if data is None:
+                still_missing.append(barcode)
+            else:
+                scan_cache.set(barcode, data)
+                result[barcode] = data
+        missing = still_missing
+
+    if missing:
+        loaded = _load_showcase_items(missing)
+        for barcode, data in loaded.items():
+            scan_cache.set(barcode, data)
+        if loaded and shared is not None:
+            shared.set_many(
+                {_shared_key(barcode): data for barcode, data in loaded.items()},
+                timeout=settings.STORE_SCAN_CACHE['SHARED_TTL'],
+            )
+        result.update(loaded)
+    return result
+
+
+def get_showcase_item(barcode):
+    return get_showcase_items([barcode]).get(barcode)
+
+
+def invalidate_barcodes(*barcodes):
+    """Вызывается после любых изменений товаров с этими штрих‑кодами."""
+    barcodes = [barcode for barcode in barcodes if barcode]
+    for barcode in barcodes:
+        scan_cache.delete(barcode)
+    shared = _shared_cache()
+    if barcodes and shared is not None:
+        shared.delete_many([_shared_key(barcode) for barcode in barcodes])
+    if barcodes:
+        invalidate_horizon()
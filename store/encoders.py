@@ -0,0 +1,103 @@
+"""
+Быстрый путь сериализации StoreItem для списков, сканера и выгрузки: строки values_list()
+превращаются в словари с теми же полями, порядком и форматами, что у StoreItemSerializer,
+но без экземпляров моделей и без per-field машинерии DRF. Преобразования полей
+собираются один раз на ответ.
+"""
+from django.conf import settings
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+import decimal
+from .serializers import StoreItemSerializer
+
+
+def _datetime_converter(field):
+    """
+    DateTimeField.to_representation с часовым поясом, определённым один раз:
+    DRF ищет текущий пояс на каждое значение. Формат ISO 8601 с 'Z' для UTC — как у DRF.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    def convert(value):
+        if field_timezone is not None:
+            value = value.astimezone(field_timezone)
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    return lambda value: value.isoformat()
+
+
+def _decimal_converter(field):
+    """DecimalField.to_representation с контекстом округления, собранным один раз."""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return field.to_representation
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    quantum = decimal.Decimal('.1') ** field.decimal_places
+    return lambda value: '{:f}'.format(value.quantize(quantum, rounding=field.rounding, context=context))
+
+
+def _converter(field):
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, serializers.DateField):
+        return _date_converter(field)
+    if isinstance(field, serializers.DecimalField):
+        return _decimal_converter(field)
+    # Строки, числа, bool, choices и pk связи приходят из БД уже в нужном виде
+    return None
+
+
+class RowEncoder:
+    """
+    Кодировщик строк values_list(*encoder.columns) в словари ответа StoreItemSerializer.
+    fields — sparse fieldset (как fields= у списков), extra — дополнительные колонки,
+    которые нужны вызывающему коду (ключи пагинации), но не попадают в ответ.
+    """
+
+    def __init__(self, fields=None, extra=(), serializer_class=StoreItemSerializer):
+        model = serializer_class.Meta.model
+        serializer_fields = serializer_class(fields=fields).fields
+        self.names = []
+        self.converters = []
+        self.columns = []
+        for name, field in serializer_fields.items():
+            self.names.append(name)
+            self.converters.append(_converter(field))
+            self.columns.append(model._meta.get_field(name).attname)
+        # Режим STORE_EXPIRY 'annotated': is_expired берётся из аннотации with_expiry()
+        self.expired_today = None
+        if settings.STORE_EXPIRY['MODE'] == 'annotated' and 'is_expired' in self.names:
+            self.expired_today = self.names.index('is_expired')
+            self.columns[self.expired_today] = 'expired_today'
+        for column in extra:
+            if column not in self.columns:
+                self.columns.append(column)
+
+    def index(self, column):
+        return self.columns.index(column)
+
+    def encode(self, row):
+        return {
+            name: convert(value) if convert is not None and value is not None else value
+            # zip обрезает extra‑колонки в конце строки
+            for name, convert, value in zip(self.names, self.converters, row)
+        }
+
+    def rows(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def encode_all(self, queryset):
+        encode = self.encode
+        return [encode(row) for row in self.rows(queryset)]
@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Sum, F
+from django.utils import timezone
+from decimal import Decimal
+import logging
+import time
+from .models import StoreItem
+from .cache import invalidate_barcodes
+from .horizon import invalidate_horizon
+
+logger = logging.getLogger(__name__)
+
+TABLE = StoreItem._meta.db_table
+
+
+def refresh_expired_flags(today=None, batch_size=None):
+    """
+    Помечает is_expired у товаров со сроком до today пачками по batch_size: один UPDATE на пачку,
+    каждая пачка — своя короткая транзакция. Возвращает метрики прогона.
+    """
+    today = today or timezone.now().date()
+    batch_size = batch_size or settings.STORE_EXPIRY['BATCH_SIZE']
+    started = time.perf_counter()
+    flagged = batches = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {TABLE} SET is_expired = true
+                WHERE id = ANY(ARRAY(
+                    SELECT id FROM {TABLE}
+                    WHERE expire_date < %s AND NOT is_expired
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                ))
+                RETURNING barcode, status
+                """,
+                [today, batch_size],
+            )
+            rows = cursor.fetchall()
+            showcase = [barcode for barcode, status in rows if status == 'showcase']
+            if showcase:
+                transaction.on_commit(lambda: invalidate_barcodes(*showcase))
+            elif rows:
+                transaction.on_commit(invalidate_horizon)
+        flagged += len(rows)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+
+    metrics = {
+        "flagged": flagged,
+        "batches": batches,
+        "seconds": round(time.perf_counter() - started, 3),
+        "date": today.isoformat(),
+    }
+    logger.info("is_expired refresh: %(flagged)s rows in %(batches)s batches, %(seconds)ss", metrics)
+    return metrics
+
+
+def expired_stock(today=None, category=None, upload_id=None, expired_from=None, expired_to=None):
+    """Просроченные товары на складе и витрине с необязательными фильтрами."""
+    today = today or timezone.now().date()
+    items = StoreItem.objects.filter(status__in=['warehouse', 'showcase'], expire_date__lt=today)
+    if category is not None:
+        items = items.filter(category=category)
+    if upload_id is not None:
+        items = items.filter(warehouse_upload_id=upload_id)
+    if expired_from is not None:
+        items = items.filter(expire_date__gte=expired_from)
+    if expired_to is not None:
+        items = items.filter(expire_date__lte=expired_to)
+    return items
+
+
+class WriteOffReport:
+    """Итоги списания: всего и по категориям."""
+
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.batches = 0
+        self.by_category = {}
+
+    def add(self, category, rows, quantity, value):
+        entry = self.by_category.setdefault(
+            category, {"category": category, "rows": 0, "quantity": 0, "value": Decimal('0')}
+        )
+        entry["rows"] += rows
+        entry["quantity"] += quantity or 0
+        entry["value"] += value or 0
+
+    def as_dict(self):
+        categories = sorted(self.by_category.values(), key=lambda entry: entry["value"], reverse=True)
+        return {
+            "dry_run": self.dry_run,
+            "rows": sum(entry["rows"] for entry in categories),
+            "quantity": sum(entry["quantity"] for entry in categories),
+            "value": str(sum((entry["value"] for entry in categories), Decimal('0.00'))),
+            "batches": self.batches,
+            "by_category": [{**entry, "value": str(entry["value"])} for entry in categories],
+        }
+
+
+def remove_expired(dry_run=False, batch_size=None, **filters):
+    """
+    Переводит просроченные товары в deleted пачками: UPDATE по id из подзапроса с LIMIT
+    и FOR UPDATE SKIP LOCKED, каждая пачка — своя транзакция. id = ANY(ARRAY(...)) вместо IN,
+    чтобы строки находились по первичному ключу, а не hash‑join по всей таблице.
+    dry_run только считает.
+    Возвращает отчёт о списании (WriteOffReport.as_dict).
+    """
+    batch_size = batch_size or settings.STORE_EXPIRY['BATCH_SIZE']
+    items = expired_stock(**filters)
+    report = WriteOffReport(dry_run)
+
+    if dry_run:
+        totals = items.values('category').annotate(
+            rows=Count('id'), total_quantity=Sum('quantity'), value=Sum(F('price') * F('quantity')),
+        ).order_by()
+        for row in totals:
+            report.add(row['category'], row['rows'], row['total_quantity'], row['value'])
+        return report.as_dict()
+
+    ids_sql, ids_params = items.order_by().values('id')[:batch_size].query.sql_with_params()
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {TABLE} SET status = 'deleted', is_expired = true
+                WHERE id = ANY(ARRAY({ids_sql} FOR UPDATE SKIP LOCKED))
+                RETURNING category, quantity, price, barcode
+                """,
+                ids_params,
+            )
+            rows = cursor.fetchall()
+            barcodes = [barcode for _, _, _, barcode in rows]
+            if barcodes:
+                transaction.on_commit(lambda: invalidate_barcodes(*barcodes))
+        report.batches += 1
+        for category, quantity, price, _ in rows:
+            report.add(category, 1, quantity, price * quantity if price is not None else None)
+        if len(rows) < batch_size:
+            break
+
+    result = report.as_dict()
+    logger.info("Expired write-off: %(rows)s rows, %(quantity)s units, value %(value)s", result)
+    return result
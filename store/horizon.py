@@ -0,0 +1,145 @@
+"""
+Кэш эндпоинта истекающих товаров. Активные товары (склад и витрина) со сроком до
+STORE_HORIZON['DAYS'] дней вперёд один раз читаются из БД, сериализуются и раскладываются
+по дням до конца срока. Снимок живёт в памяти процесса под ключом (дата, версия):
+любая запись товаров поднимает версию, смена даты пересобирает снимок на первом запросе,
+TTL ограничивает возраст снимка.
+"""
+from bisect import bisect_right
+from django.conf import settings
+from django.core.cache import caches
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status as http_status
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from datetime import timedelta
+import threading
+import time
+from .encoders import RowEncoder
+from .models import StoreItem
+from .pagination import KeysetPagination, InvalidListParameter, parse_fields
+from .renderers import dumps
+from .serializers import StoreItemSerializer
+
+ACTIVE_STATUSES = ('warehouse', 'showcase')
+ORDERING = ('expire_date', 'id')
+VERSION_KEY = "store:horizon:version"
+
+_lock = threading.Lock()
+_local_version = 0
+_snapshot = (None, 0.0, None)
+
+
+def _shared_cache():
+    alias = settings.STORE_HORIZON.get('BACKEND')
+    return caches[alias] if alias else None
+
+
+def _version():
+    shared = _shared_cache()
+    return _local_version, shared.get(VERSION_KEY, 0) if shared is not None else 0
+
+
+def invalidate_horizon():
+    """Вызывается после записи товаров; другие процессы видят новую версию через общий backend."""
+    global _local_version
+    with _lock:
+        _local_version += 1
+    shared = _shared_cache()
+    if shared is not None:
+        try:
+            shared.incr(VERSION_KEY)
+        except ValueError:
+            shared.set(VERSION_KEY, 1, timeout=None)
+
+
+class Horizon:
+    """
+    Снимок на дату: для каждого среза (категория, статус), включая «все», строки отсортированы
+    по (expire_date, id). Сортировка по сроку делает дни до конца срока соседними корзинами,
+    поэтому горизонт в N дней — префикс списка, а курсор — позиция в нём (bisect).
+    """
+
+    def __init__(self, today, entries):
+        self.today = today
+        self.views = {}
+        for key, row in entries:
+            category, status = row['category'], row['status']
+            views = ((None, None), (None, status))
+            if category is not None:
+                views += ((category, None), (category, status))
+            for view in views:
+                keys, view_rows = self.views.setdefault(view, ([], []))
+                keys.append(key)
+                view_rows.append(row)
+
+    def select(self, days, category=None, status=None):
+        """Ключи и строки среза и граница горизонта: строки[:end] истекают не позже today + days."""
+        keys, rows = self.views.get((category, status), ([], []))
+        end = bisect_right(keys, (self.today + timedelta(days=days), float('inf')))
+        return keys, rows, end
+
+
+def build_horizon(today):
+    """Снимок из values_list() через RowEncoder: строки совпадают с StoreItemSerializer."""
+    items = (
+        StoreItem.objects.filter(status__in=ACTIVE_STATUSES,
+                                 expire_date__lte=today + timedelta(days=settings.STORE_HORIZON['DAYS']))
+        .with_expiry(today)
+        .order_by(*ORDERING)
+    )
+    encoder = RowEncoder(extra=ORDERING)
+    i_expire, i_id = encoder.index('expire_date'), encoder.index('id')
+    encode = encoder.encode
+    entries = [((row[i_expire], row[i_id]), encode(row)) for row in encoder.rows(items)]
+    return Horizon(today, entries)
+
+
+def get_horizon(today=None):
+    global _snapshot
+    today = today or timezone.now().date()
+    key = (today, _version())
+    cached_key, expires_at, horizon = _snapshot
+    if cached_key != key or expires_at < time.monotonic():
+        horizon = build_horizon(today)
+        _snapshot = (key, time.monotonic() + settings.STORE_HORIZON['TTL'], horizon)
+    return horizon
+
+
+def horizon_response(request, days, category=None, status=None):
+    """Тот же формат, что у store.pagination.list_response, но из снимка: fields=, limit/cursor, stream=ndjson."""
+    keys, rows, end = get_horizon().select(days, category, status)
+    paginator = KeysetPagination(ORDERING)
+    try:
+        fields = parse_fields(request, StoreItemSerializer)
+
+        def project(page):
+            if fields is None:
+                return page
+            return [{name: row[name] for name in fields} for row in page]
+
+        if request.query_params.get('stream') == 'ndjson':
+            lines = (dumps(row) + "\n" for row in project(rows[:end]))
+            return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+        if not paginator.is_requested(request):
+            return Response(project(rows[:end]))
+
+        limit = paginator.get_limit(request)
+        start = 0
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            start = bisect_right(keys, paginator.decode_cursor(cursor, StoreItem), 0, end)
+    except InvalidListParameter as exc:
+        return Response({"error": str(exc)}, status=http_status.HTTP_400_BAD_REQUEST)
+
+    page = rows[start:min(start + limit, end)]
+    next_cursor = None
+    if start + limit < end:
+        next_cursor = paginator.encode_cursor(page[-1]['expire_date'], page[-1]['id'])
+    return Response({
+        "results": project(page),
+        "next_cursor": next_cursor,
+        "next": replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor) if next_cursor else None,
+    })
@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+import threading
+import time
+from store.models import StoreItem, SaleEvent, DailySales
+from store.services import sell, StockError
+
+
+def legacy_sell(product_id, quantity):
+    # Прежний SellStoreItemView: чтение → проверка → save() без блокировок
+    product = StoreItem.objects.get(id=product_id)
+    if product.status != "showcase" or product.quantity < quantity:
+        raise StockError("Insufficient quantity on store")
+    product.quantity -= quantity
+    if product.quantity == 0:
+        product.status = "deleted"
+    product.save()
+    sold_item, _ = StoreItem.objects.get_or_create(
+        barcode=product.barcode,
+        status="sold",
+        defaults={
+            "name": product.name,
+            "category": product.category,
+            "quantity": 0,
+            "price": product.price,
+            "expire_date": product.expire_date,
+        },
+    )
+    sold_item.quantity += quantity
+    sold_item.save()
+
+
+class Command(BaseCommand):
+    help = (
+        'Concurrent-sell stress test: several threads sell one showcase item unit by unit. '
+        'Reports throughput and lost updates; seeded rows are removed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--sells', type=int, default=200, help='sells per thread')
+        parser.add_argument('--legacy', action='store_true', help='also run the old read-modify-save path')
+
+    def run(self, label, sell_func, threads, sells):
+        stock = threads * sells
+        item = StoreItem.objects.create(
+            name='Stress item', category='bench', quantity=stock, price=Decimal('1.00'),
+            expire_date=date(2099, 1, 1), status='showcase',
+        )
+        succeeded = []
+        lock = threading.Lock()
+
+        def worker():
+            done = 0
+            try:
+                for _ in range(sells):
+                    try:
+                        sell_func(item.id, 1)
+                        done += 1
+                    except Exception:
+                        pass
+            finally:
+                connection.close()
+            with lock:
+                succeeded.append(done)
+
+        rows = StoreItem.objects.filter(barcode=item.barcode)
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                for _ in range(threads):
+                    pool.submit(worker)
+            elapsed = time.perf_counter() - started
+
+            remaining = sum(r.quantity for r in rows if r.status in ('showcase', 'deleted'))
+            sold = sum(r.quantity for r in rows if r.status == 'sold')
+            sold_rows = sum(1 for r in rows if r.status == 'sold')
+            accepted = sum(succeeded)
+        finally:
+            # services.sell пишет события продаж: без этого они попали бы в DailySales и прогноз
+            SaleEvent.objects.filter(barcode=item.barcode).delete()
+            DailySales.objects.filter(barcode=item.barcode).delete()
+            rows.delete()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f"  accepted sells:  {accepted} in {elapsed:.2f}s ({accepted / elapsed:,.0f} sells/s)")
+        self.stdout.write(f"  stock left:      {remaining} (expected {stock - accepted})")
+        self.stdout.write(f"  sold recorded:   {sold} in {sold_rows} row(s) (expected {accepted} in 1)")
+        self.stdout.write(f"  lost updates:    {(remaining - (stock - accepted)) + (accepted - sold)}")
+
+    def handle(self, *args, **options):
+        threads, sells = options['threads'], options['sells']
+        self.run('services.sell (atomic UPDATE ... RETURNING + upsert)', sell, threads, sells)
+        if options['legacy']:
+            self.run('legacy read-modify-save', legacy_sell, threads, sells)
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+import time
+from store.encoders import RowEncoder
+from store.models import StoreItem
+from store.renderers import ORJSONRenderer, orjson
+from store.serializers import StoreItemSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+def best_of(repeat, func):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = (
+        'Rows per second of the StoreItem list response: StoreItemSerializer vs RowEncoder over values_list(), '
+        'and JSONRenderer vs the orjson renderer. Checks that both paths render identical bytes. '
+        'Seeded rows live in one transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--fields', help='sparse fieldset, as in ?fields=id,name,price')
+
+    def seed(self, rows):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO store_storeitem
+                    (name, category, quantity, price, expire_date, status, is_expired, barcode, added_at)
+                SELECT 'Item ' || g, 'cat-' || (g %% 500), 1 + g %% 50, (g %% 10000) / 100.0,
+                       CURRENT_DATE + (g %% 400) - 30, 'showcase', false, 'bench' || g,
+                       now() - make_interval(secs => g)
+                FROM generate_series(1, %(rows)s) AS g
+                """,
+                {'rows': rows},
+            )
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        fields = options['fields'].split(',') if options['fields'] else None
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed, the renderer comparison is skipped"))
+
+        results = {}
+        try:
+            with transaction.atomic():
+                self.seed(rows)
+                items = StoreItem.objects.filter(barcode__startswith='bench').with_expiry().order_by('added_at', 'id')
+                encoder = RowEncoder(fields)
+
+                results['StoreItemSerializer'], data = best_of(
+                    repeat, lambda: StoreItemSerializer(items, many=True, fields=fields).data)
+                results['RowEncoder'], rows_data = best_of(repeat, lambda: encoder.encode_all(items))
+                raise Rollback
+        except Rollback:
+            pass
+
+        results['JSONRenderer'], expected = best_of(repeat, lambda: JSONRenderer().render(data))
+        rendered = JSONRenderer().render(rows_data)
+        if orjson is not None:
+            results['ORJSONRenderer'], rendered = best_of(repeat, lambda: ORJSONRenderer().render(rows_data))
+        if rendered != expected:
+            raise CommandError("Fast path output differs from StoreItemSerializer + JSONRenderer")
+
+        self.stdout.write(f"{rows:,} rows, best of {repeat}, fields: {','.join(fields) if fields else 'all'}")
+        self.stdout.write(f"{'stage':<22}{'seconds':>10}{'rows/s':>14}")
+        for name, seconds in results.items():
+            self.stdout.write(f"{name:<22}{seconds:>10.3f}{rows / seconds:>14,.0f}")
+        before = results['StoreItemSerializer'] + results['JSONRenderer']
+        after = results['RowEncoder'] + results.get('ORJSONRenderer', results['JSONRenderer'])
+        self.stdout.write(self.style.SUCCESS(
+            f"end to end: {rows / before:,.0f} → {rows / after:,.0f} rows/s (x{before / after:.1f}), output identical"
+        ))
@@ -0,0 +1,125 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from datetime import timedelta
+import json
+from store.models import StoreItem
+from warehouse_app.models import Upload
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed StoreItem with synthetic rows and report query plans and latencies of hot queries '
+        'with and without the StoreItem indexes. Everything runs in one transaction that is rolled back; '
+        'use a non-production database, indexes are dropped inside that transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--categories', type=int, default=2000)
+        parser.add_argument('--uploads', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def seed(self, rows, categories, uploads):
+        upload_ids = [
+            str(Upload.objects.create(file_name=f'bench-{pos}.csv', status=Upload.STATUS_DONE).id)
+            for pos in range(uploads)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO store_storeitem
+                    (name, category, quantity, price, expire_date, status, is_expired, barcode, added_at, warehouse_upload_id)
+                SELECT
+                    'Item ' || g,
+                    'cat-' || (g %% %(categories)s),
+                    1 + g %% 50,
+                    (g %% 10000) / 100.0,
+                    CURRENT_DATE + (g %% 400) - 30,
+                    CASE
+                        WHEN g %% 10 < 2 THEN 'warehouse'
+                        WHEN g %% 10 < 4 THEN 'showcase'
+                        WHEN g %% 10 < 9 THEN 'sold'
+                        ELSE 'deleted'
+                    END,
+                    false,
+                    'bench' || g,
+                    now() - make_interval(days => g %% 365),
+                    (%(uploads)s::uuid[])[1 + g %% %(upload_count)s]
+                FROM generate_series(1, %(rows)s) AS g
+                """,
+                {'rows': rows, 'categories': categories, 'uploads': upload_ids, 'upload_count': len(upload_ids)},
+            )
+            cursor.execute('ANALYZE store_storeitem')
+        return upload_ids
+
+    def hot_queries(self, upload_ids):
+        today = timezone.now().date()
+        return {
+            'scan barcode': StoreItem.objects.filter(barcode='bench12', status='showcase').order_by('id')[:1],
+            'showcase list': StoreItem.objects.filter(status='showcase'),
+            'upload items': StoreItem.objects.filter(warehouse_upload_id=upload_ids[11], status='warehouse'),
+            'expiring 7d': StoreItem.objects.filter(
+                status__in=['warehouse', 'showcase'], expire_date__lte=today + timedelta(days=7),
+            ),
+            'category sales 30d': StoreItem.objects.filter(
+                category='cat-7', status='sold', added_at__gte=timezone.now() - timedelta(days=30),
+            ),
+        }
+
+    def explain(self, queryset, repeat):
+        sql, params = queryset.query.sql_with_params()
+        timings = []
+        plan = None
+        with connection.cursor() as cursor:
+            for _ in range(repeat):
+                cursor.execute('EXPLAIN (ANALYZE, FORMAT JSON) ' + sql, params)
+                result = cursor.fetchone()[0]
+                result = json.loads(result) if isinstance(result, str) else result
+                plan = result[0]['Plan']
+                timings.append(result[0]['Execution Time'])
+        return sorted(timings)[len(timings) // 2], self.describe(plan)
+
+    def describe(self, plan):
+        nodes = []
+        stack = [plan]
+        while stack:
+            node = stack.pop()
+            label = node['Node Type']
+            if 'Index Name' in node:
+                label += f" using {node['Index Name']}"
+            nodes.append(label)
+            stack.extend(node.get('Plans', []))
+        return ' > '.join(nodes)
+
+    def run_suite(self, queries, repeat):
+        return {name: self.explain(queryset, repeat) for name, queryset in queries.items()}
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Seeding {options['rows']:,} rows...")
+                upload_ids = self.seed(options['rows'], options['categories'], options['uploads'])
+                queries = self.hot_queries(upload_ids)
+
+                with_indexes = self.run_suite(queries, options['repeat'])
+                with connection.cursor() as cursor:
+                    for index in StoreItem._meta.indexes:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+                    cursor.execute('ANALYZE store_storeitem')
+                without_indexes = self.run_suite(queries, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        for name in queries:
+            before_ms, before_plan = without_indexes[name]
+            after_ms, after_plan = with_indexes[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f"  without indexes: {before_ms:9.3f} ms  {before_plan}")
+            self.stdout.write(f"  with indexes:    {after_ms:9.3f} ms  {after_plan}")
+            self.stdout.write(f"  speedup:         x{before_ms / max(after_ms, 0.001):.1f}")
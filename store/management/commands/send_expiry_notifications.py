@@ -1,33 +1,41 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
 from store.models import StoreItem
-from django.core.mail import send_mail
-from django.conf import settings
+from store.notifications import build_digest, queue_digests, EXPIRED, EXPIRING, RECIPIENT, iterate_all
 
 
 class Command(BaseCommand):
     help = 'Send notifications for products nearing expiration'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+
     def handle(self, *args, **options):
-        threshold_days = 7
         today = timezone.now().date()
-        threshold_date = today + timedelta(days=threshold_days)
+        threshold_date = today + timedelta(days=options['days'])
+
+        products = (
+            StoreItem.objects.filter(expire_date__lte=threshold_date, warehouse_upload__uploaded_by__isnull=False)
+            .exclude(status='sold')
+            .order_by('warehouse_upload__uploaded_by_id', 'expire_date', 'id')
+            .values('name', 'category', 'expire_date', **RECIPIENT)
+        )
 
-        products = StoreItem.objects.filter(expire_date__lte=threshold_date).exclude(status='sold')
-        for product in products:
-            if product.warehouse_upload and product.warehouse_upload.uploaded_by:
-                recipient = product.warehouse_upload.uploaded_by.email
-                subject = f"Notification: expiration date of the product '{product.name}' expires {product.expire_date}"
-                message = (
-                    f"Dear User,\n\n"
-                    f"Please note that the expiration date of the product '{product.name}' (category: {product.category}) "
-                    f"expires {product.expire_date}. It is recommended to take the necessary actions.\n\n"
-                    "With respect,\nYour warehouse management system"
+        def digests():
+            for _, items in groupby(iterate_all(products),
+                                    key=itemgetter('recipient_id')):
+                items = list(items)
+                recipient = items[0]['recipient']
+                expired = [item for item in items if item['expire_date'] <= today]
+                expiring = [item for item in items if item['expire_date'] > today]
+                self.stdout.write(f"Digest for {recipient}: {len(expired)} {EXPIRED}, {len(expiring)} {EXPIRING}")
+                yield build_digest(
+                    recipient, expired, expiring, today,
+                    expiring_title=f"{{count}} product(s) expire within {options['days']} days:",
                 )
-                try:
-                    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [recipient])
-                    self.stdout.write(f"Notification sent for product {product.name} to {recipient}")
-                except Exception as e:
-                    self.stdout.write(f"Failed to send notification for {product.name}: {e}")
-        self.stdout.write("Notifications sent.")
+
+        queued = queue_digests(list(digests()))
+        self.stdout.write(f"Notifications queued: {queued} digest emails.")
@@ -0,0 +1,107 @@
+from django.db import connection, transaction
+from django.utils import timezone
+import logging
+import time
+from .models import StoreItem, MarkdownRule, PriceChange
+from .cache import invalidate_barcodes
+
+logger = logging.getLogger(__name__)
+
+TABLE = StoreItem._meta.db_table
+HISTORY_TABLE = PriceChange._meta.db_table
+
+# Округление до ценовой точки; {price} — выражение с ценой после скидки
+ROUNDING_SQL = {
+    'cent': "ROUND({price}, 2)",
+    'down_10': "GREATEST(FLOOR({price} * 10) / 10, 0.01)",
+    'ending_99': "CASE WHEN {price} >= 0.99 THEN FLOOR({price} + 0.01) - 0.01 ELSE ROUND({price}, 2) END",
+}
+
+
+def _rule_conditions(rule, today):
+    conditions = ["s.status = 'showcase'", "s.price IS NOT NULL", "s.expire_date >= %(today)s"]
+    if rule.category:
+        conditions.append("s.category = %(category)s")
+    if rule.expires_within_days is not None:
+        conditions.append("s.expire_date <= %(today)s + %(days)s")
+    if rule.shelf_life_left is not None:
+        # Та же доля срока, что в уведомлениях: дни до конца срока против полного срока с момента поступления
+        added_date = "(s.added_at AT TIME ZONE %(tz)s)::date"
+        conditions.append(f"s.expire_date > {added_date}")
+        conditions.append(f"(s.expire_date - %(today)s) <= %(share)s * (s.expire_date - {added_date})")
+    return conditions
+
+
+def apply_rule(rule, today=None, user=None):
+    """
+    Применяет правило одним запросом: CTE выбирает товары, UPDATE ставит цену, INSERT пишет
+    историю. Скидка считается от базовой цены (old_price первой записи истории), поэтому
+    правила не складываются: цена только снижается, более мелкая скидка товар не трогает.
+    Возвращает число уценённых товаров.
+    """
+    today = today or timezone.now().date()
+    price = "c.base_price * (1 - %(discount)s / 100.0)"
+    new_price = ROUNDING_SQL[rule.rounding].format(price=price)
+    sql = f"""
+        WITH candidates AS (
+            SELECT s.id, s.barcode, s.price AS old_price,
+                   COALESCE((
+                       SELECT h.old_price FROM {HISTORY_TABLE} h
+                       WHERE h.store_item_id = s.id ORDER BY h.id LIMIT 1
+                   ), s.price) AS base_price
+            FROM {TABLE} s
+            WHERE {' AND '.join(_rule_conditions(rule, today))}
+            FOR UPDATE OF s
+        ), priced AS (
+            SELECT c.id, c.barcode, c.old_price, {new_price} AS new_price FROM candidates c
+        ), updated AS (
+            UPDATE {TABLE} s SET price = p.new_price
+            FROM priced p
+            WHERE s.id = p.id AND p.new_price < p.old_price
+            RETURNING s.id, s.barcode, p.old_price, p.new_price
+        )
+        INSERT INTO {HISTORY_TABLE} (store_item_id, barcode, rule_id, reason, old_price, new_price, changed_by_id, changed_at)
+        SELECT id, barcode, %(rule)s, 'markdown', old_price, new_price, %(user)s, now() FROM updated
+        RETURNING barcode
+    """
+    params = {
+        'today': today,
+        'category': rule.category,
+        'days': rule.expires_within_days,
+        'share': rule.shelf_life_left,
+        'tz': timezone.get_current_timezone_name(),
+        'discount': rule.discount_percentage,
+        'rule': rule.id,
+        'user': user.id if user is not None else None,
+    }
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        barcodes = sorted({barcode for (barcode,) in rows})
+        if barcodes:
+            transaction.on_commit(lambda: invalidate_barcodes(*barcodes))
+    return len(rows)
+
+
+def apply_markdowns(rule_ids=None, today=None, user=None):
+    """
+    Прогон активных правил по всей витрине, каждое правило — одна транзакция. Более глубокие
+    скидки идут первыми, чтобы товар под несколькими правилами менял цену один раз.
+    """
+    today = today or timezone.now().date()
+    rules = MarkdownRule.objects.filter(is_active=True).order_by('-discount_percentage', 'id')
+    if rule_ids is not None:
+        rules = rules.filter(id__in=rule_ids)
+
+    results = []
+    for rule in rules:
+        started = time.perf_counter()
+        items = apply_rule(rule, today, user)
+        results.append({
+            "rule": rule.id,
+            "name": rule.name,
+            "items": items,
+            "seconds": round(time.perf_counter() - started, 3),
+        })
+    logger.info("Markdowns for %s: %s", today, results)
+    return {"date": today.isoformat(), "items": sum(entry["items"] for entry in results), "rules": results}
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_alter_storeitem_barcode'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE SEQUENCE IF NOT EXISTS store_barcode_block_seq START 1",
+            reverse_sql="DROP SEQUENCE IF EXISTS store_barcode_block_seq",
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 02:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не блокирует запись в большую таблицу, но не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('store', '0003_barcode_block_sequence'),
+        ('warehouse_app', '0002_upload_import_job'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='storeitem',
+            index=models.Index(fields=['barcode', 'status'], name='storeitem_barcode_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='storeitem',
+            index=models.Index(fields=['status', 'expire_date'], name='storeitem_status_expire_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='storeitem',
+            index=models.Index(fields=['category', 'status', 'added_at'], name='storeitem_cat_status_added_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='storeitem',
+            index=models.Index(fields=['warehouse_upload', 'status'], name='storeitem_upload_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='storeitem',
+            index=models.Index(condition=models.Q(('status__in', ['warehouse', 'showcase'])), fields=['expire_date'], name='storeitem_active_expire_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='storeitem',
+            index=models.Index(condition=models.Q(('status', 'showcase')), fields=['barcode'], name='storeitem_showcase_barcode_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 02:07
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_rows(apps, schema_editor):
+    # До ограничения get_or_create мог создать несколько строк на штрих‑код и статус:
+    # сливаем их количество в самую раннюю строку
+    StoreItem = apps.get_model('store', 'StoreItem')
+    duplicates = (
+        StoreItem.objects
+        .filter(status__in=['warehouse', 'showcase', 'sold'], barcode__isnull=False)
+        .values('barcode', 'status')
+        .annotate(rows=Count('id'), total=Sum('quantity'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        rows = StoreItem.objects.filter(barcode=duplicate['barcode'], status=duplicate['status'])
+        keep_id = rows.order_by('id').values_list('id', flat=True).first()
+        rows.exclude(id=keep_id).delete()
+        StoreItem.objects.filter(id=keep_id).update(quantity=duplicate['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_storeitem_indexes'),
+        ('warehouse_app', '0002_upload_import_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='storeitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['warehouse', 'showcase', 'sold'])), fields=('barcode', 'status'), name='storeitem_unique_barcode_status'),
+        ),
+    ]
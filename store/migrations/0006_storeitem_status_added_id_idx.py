@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 09:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('store', '0005_storeitem_unique_barcode_status'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='storeitem',
+            index=models.Index(fields=['status', 'added_at', 'id'], name='storeitem_status_added_id_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2 on 2026-10-18 02:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_daily_sales(apps, schema_editor):
+    # До журнала продаж от каждой продажи оставалась только sold‑строка с датой первой
+    # продажи этого штрих‑кода: переносим её в DailySales как продажу за тот день
+    schema_editor.execute(
+        """
+        INSERT INTO store_dailysales (date, category, barcode, quantity, revenue)
+        SELECT (added_at AT TIME ZONE %s)::date, category, barcode,
+               SUM(quantity), COALESCE(SUM(price * quantity), 0)
+        FROM store_storeitem
+        WHERE status = 'sold'
+        GROUP BY 1, 2, 3
+        """,
+        [settings.TIME_ZONE],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_storeitem_status_added_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(blank=True, max_length=255, null=True)),
+                ('barcode', models.CharField(blank=True, max_length=255, null=True)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'date'], name='dailysales_category_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'category', 'barcode'), name='dailysales_unique_day_category_barcode', nulls_distinct=False)],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaleEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.CharField(blank=True, max_length=255, null=True)),
+                ('category', models.CharField(blank=True, max_length=255, null=True)),
+                ('quantity', models.IntegerField()),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('sold_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('rolled_up', models.BooleanField(default=False)),
+                ('store_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sale_events', to='store.storeitem')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('rolled_up', False)), fields=['id'], name='saleevent_pending_idx'), models.Index(fields=['sold_at'], name='saleevent_sold_at_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_sales, migrations.RunPython.noop),
+    ]
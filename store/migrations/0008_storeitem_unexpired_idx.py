@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 02:33
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('store', '0007_sales_ledger'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='storeitem',
+            index=models.Index(condition=models.Q(('is_expired', False)), fields=['expire_date'], name='storeitem_unexpired_idx'),
+        ),
+    ]
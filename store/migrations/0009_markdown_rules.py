@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-18 02:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_storeitem_unexpired_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarkdownRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('category', models.CharField(blank=True, help_text='Empty: all categories', max_length=255, null=True)),
+                ('expires_within_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('shelf_life_left', models.DecimalField(blank=True, decimal_places=2, help_text='Remaining share of the shelf life, e.g. 0.30', max_digits=3, null=True)),
+                ('discount_percentage', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('rounding', models.CharField(choices=[('cent', 'To the cent'), ('down_10', 'Down to 0.10'), ('ending_99', 'Down to a .99 price point')], default='cent', max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('expires_within_days__isnull', False), ('shelf_life_left__isnull', False), _connector='OR'), name='markdownrule_has_condition'), models.CheckConstraint(condition=models.Q(('discount_percentage__gt', 0), ('discount_percentage__lt', 100)), name='markdownrule_discount_range')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.CharField(blank=True, max_length=255, null=True)),
+                ('reason', models.CharField(choices=[('manual', 'Manual discount'), ('markdown', 'Markdown rule')], max_length=20)),
+                ('old_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('new_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('rule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='price_changes', to='store.markdownrule')),
+                ('store_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='price_changes', to='store.storeitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store_item', 'id'], name='pricechange_item_id_idx')],
+            },
+        ),
+    ]
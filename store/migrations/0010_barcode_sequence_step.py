@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def sequence_in_numbers(apps, schema_editor):
+    # Раньше nextval был номером блока (диапазон [v * B, v * B + B) с B из settings),
+    # теперь последовательность сама считает номера с шагом в блок: nextval — начало диапазона.
+    # Перезапускаем её после всех выданных номеров: по старой схеме и по кодам в таблице.
+    step = settings.STORE_BARCODE_BLOCK_SIZE
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT last_value, is_called FROM store_barcode_block_seq")
+        last_value, is_called = cursor.fetchone()
+        issued = (last_value + 1) * step if is_called else 0
+        cursor.execute(
+            "SELECT max(substr(barcode, 2, 11)::bigint) + 1 FROM store_storeitem WHERE barcode ~ '^2[0-9]{12}$'"
+        )
+        used = cursor.fetchone()[0] or 0
+        start = max(issued, used, 1)
+        cursor.execute(f"ALTER SEQUENCE store_barcode_block_seq INCREMENT BY {int(step)} RESTART WITH {int(start)}")
+
+
+def sequence_in_blocks(apps, schema_editor):
+    step = settings.STORE_BARCODE_BLOCK_SIZE
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT last_value FROM store_barcode_block_seq")
+        last_value = cursor.fetchone()[0]
+        cursor.execute(
+            f"ALTER SEQUENCE store_barcode_block_seq INCREMENT BY 1 RESTART WITH {int(last_value) // step + 2}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_markdown_rules'),
+    ]
+
+    operations = [
+        migrations.RunPython(sequence_in_numbers, sequence_in_blocks),
+    ]
@@ -1,9 +1,26 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
-import random
+from .barcodes import allocate_barcodes
 
 # Create your models here.
 
+class StoreItemQuerySet(models.QuerySet):
+    def with_expiry(self, today=None):
+        """
+        В режиме STORE_EXPIRY['MODE'] == 'annotated' добавляет expired_today — признак просрочки
+        на момент запроса; сериализатор отдаёт его вместо хранимого is_expired.
+        """
+        if settings.STORE_EXPIRY['MODE'] != 'annotated':
+            return self
+        today = today or timezone.now().date()
+        return self.annotate(
+            expired_today=models.ExpressionWrapper(
+                models.Q(expire_date__lt=today), output_field=models.BooleanField()
+            )
+        )
+
+
 class StoreItem(models.Model):
     STATUS_CHOICES = [
         ('warehouse', 'On warehouse'),
@@ -23,23 +40,182 @@ class StoreItem(models.Model):
     added_at = models.DateTimeField(auto_now_add=True)
     warehouse_upload = models.ForeignKey('warehouse_app.Upload', on_delete=models.SET_NULL, null=True, blank=True)
 
+    objects = StoreItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Сканер на кассе и перемещения: barcode + status
+            models.Index(fields=['barcode', 'status'], name='storeitem_barcode_status_idx'),
+            models.Index(fields=['status', 'expire_date'], name='storeitem_status_expire_idx'),
+            # Прогноз и отчёты по категориям
+            models.Index(fields=['category', 'status', 'added_at'], name='storeitem_cat_status_added_idx'),
+            models.Index(fields=['warehouse_upload', 'status'], name='storeitem_upload_status_idx'),
+            # Keyset‑пагинация списков: WHERE status = ... ORDER BY added_at, id
+            models.Index(fields=['status', 'added_at', 'id'], name='storeitem_status_added_id_idx'),
+            # Уведомления и списание: только товары на складе и витрине
+            models.Index(
+                fields=['expire_date'],
+                name='storeitem_active_expire_idx',
+                condition=models.Q(status__in=['warehouse', 'showcase']),
+            ),
+            models.Index(
+                fields=['barcode'],
+                name='storeitem_showcase_barcode_idx',
+                condition=models.Q(status='showcase'),
+            ),
+            # Ночной пересчёт is_expired: только ещё не помеченные строки
+            models.Index(
+                fields=['expire_date'],
+                name='storeitem_unexpired_idx',
+                condition=models.Q(is_expired=False),
+            ),
+        ]
+        constraints = [
+            # Одна строка на штрих‑код в каждом живом статусе: перемещения и продажи делают upsert в неё
+            models.UniqueConstraint(
+                fields=['barcode', 'status'],
+                condition=models.Q(status__in=['warehouse', 'showcase', 'sold']),
+                name='storeitem_unique_barcode_status',
+            ),
+        ]
+
     def generate_unique_barcode(self):
-        while True:
-            code = str(random.randint(10**11, 10**12 - 1))
-            if code not in StoreItem.objects.all():
-                if not StoreItem.objects.filter(barcode=code).exists():
-                    return code
-            else:
-                self.generate_unique_barcode()
+        return allocate_barcodes(1)[0]
+
+    @classmethod
+    def generate_unique_barcodes(cls, count):
+        # Пачка штрих‑кодов для импорта без запросов к таблице товаров
+        return allocate_barcodes(count)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Срок на момент чтения: save() пересчитывает is_expired, только если срок изменили
+        instance._loaded_expire_date = instance.__dict__.get('expire_date')
+        return instance
 
     def save(self, *args, **kwargs):
         if not self.barcode:
             self.barcode = self.generate_unique_barcode()
-        if self.expire_date < timezone.now().date():
-            self.is_expired = True
-        else:
-            self.is_expired = False
+        expire_date = self.__dict__.get('expire_date')
+        if self._state.adding or (
+            expire_date is not None and expire_date != getattr(self, '_loaded_expire_date', expire_date)
+        ):
+            # Между изменениями срока флаг поддерживает ночная задача store.tasks.refresh_expired_flags
+            self.is_expired = expire_date < timezone.now().date()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'is_expired' not in update_fields:
+                kwargs['update_fields'] = [*update_fields, 'is_expired']
         super().save(*args, **kwargs)
+        self._loaded_expire_date = self.__dict__.get('expire_date')
+
+    def __str__(self):
+        return self.name
+
+class SaleEvent(models.Model):
+    """Неизменяемая запись о продаже; сворачивается в DailySales компактором."""
+    store_item = models.ForeignKey(StoreItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='sale_events')
+    barcode = models.CharField(max_length=255, blank=True, null=True)
+    category = models.CharField(max_length=255, blank=True, null=True)
+    quantity = models.IntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    sold_at = models.DateTimeField(default=timezone.now)
+    rolled_up = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], name='saleevent_pending_idx', condition=models.Q(rolled_up=False)),
+            models.Index(fields=['sold_at'], name='saleevent_sold_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.barcode} x{self.quantity} @ {self.sold_at:%Y-%m-%d %H:%M}"
+
+
+class DailySales(models.Model):
+    """Продажи за день по (категория, штрих‑код): отчёты и прогноз читают дни, а не события."""
+    date = models.DateField()
+    category = models.CharField(max_length=255, blank=True, null=True)
+    barcode = models.CharField(max_length=255, blank=True, null=True)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'category', 'barcode'],
+                name='dailysales_unique_day_category_barcode',
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'date'], name='dailysales_category_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.category} {self.barcode}: {self.quantity}"
+
+
+class MarkdownRule(models.Model):
+    """
+    Правило уценки витрины: скидка от базовой цены (цены до первой уценки) товарам категории,
+    у которых до конца срока осталось не больше N дней и/или не больше доли срока годности.
+    """
+    ROUNDING_CHOICES = [
+        ('cent', 'To the cent'),
+        ('down_10', 'Down to 0.10'),
+        ('ending_99', 'Down to a .99 price point'),
+    ]
+
+    name = models.CharField(max_length=255)
+    category = models.CharField(max_length=255, blank=True, null=True, help_text='Empty: all categories')
+    expires_within_days = models.PositiveIntegerField(null=True, blank=True)
+    shelf_life_left = models.DecimalField(
+        max_digits=3, decimal_places=2, null=True, blank=True,
+        help_text='Remaining share of the shelf life, e.g. 0.30',
+    )
+    discount_percentage = models.DecimalField(max_digits=5, decimal_places=2)
+    rounding = models.CharField(max_length=20, choices=ROUNDING_CHOICES, default='cent')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(expires_within_days__isnull=False) | models.Q(shelf_life_left__isnull=False),
+                name='markdownrule_has_condition',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(discount_percentage__gt=0, discount_percentage__lt=100),
+                name='markdownrule_discount_range',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name}: -{self.discount_percentage}%"
+
+
+class PriceChange(models.Model):
+    """История цен: ручные скидки и уценки по правилам."""
+    REASON_CHOICES = [
+        ('manual', 'Manual discount'),
+        ('markdown', 'Markdown rule'),
+    ]
+
+    store_item = models.ForeignKey(StoreItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='price_changes')
+    barcode = models.CharField(max_length=255, blank=True, null=True)
+    rule = models.ForeignKey(MarkdownRule, on_delete=models.SET_NULL, null=True, blank=True, related_name='price_changes')
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    old_price = models.DecimalField(max_digits=10, decimal_places=2)
+    new_price = models.DecimalField(max_digits=10, decimal_places=2)
+    changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Базовая цена товара — old_price его первой записи
+            models.Index(fields=['store_item', 'id'], name='pricechange_item_id_idx'),
+        ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"{self.barcode}: {self.old_price} -> {self.new_price}"
@@ -0,0 +1,175 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+from drf_yasg import openapi
+from datetime import datetime
+from operator import attrgetter, itemgetter
+import base64
+import json
+from .encoders import RowEncoder
+from .renderers import dumps
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+STREAM_CHUNK_SIZE = 2000
+
+LIST_PARAMETERS = [
+    openapi.Parameter(
+        name="fields", in_=openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Только перечисленные поля, через запятую: fields=id,name,price",
+    ),
+    openapi.Parameter(
+        name="limit", in_=openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+        description=f"Размер страницы (до {MAX_LIMIT}); включает keyset‑пагинацию",
+    ),
+    openapi.Parameter(
+        name="cursor", in_=openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description="Курсор следующей страницы из next_cursor",
+    ),
+    openapi.Parameter(
+        name="stream", in_=openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=["ndjson"],
+        description="stream=ndjson — выгрузка всех строк потоком, по JSON‑объекту на строку",
+    ),
+]
+
+
+class InvalidListParameter(ValueError):
+    pass
+
+
+class KeysetPagination:
+    """
+    Keyset‑пагинация по паре (поле, id): страница выбирается условием «после курсора»,
+    а не OFFSET, поэтому стоимость не растёт с номером страницы.
+    """
+
+    def __init__(self, ordering=('added_at', 'id')):
+        self.field, self.tiebreaker = ordering
+
+    @staticmethod
+    def is_requested(request):
+        return 'limit' in request.query_params or 'cursor' in request.query_params
+
+    def encode_cursor(self, value, key):
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([value, str(key)]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor, model):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            value, key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return (
+                model._meta.get_field(self.field).to_python(value),
+                model._meta.get_field(self.tiebreaker).to_python(key),
+            )
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidListParameter("Invalid cursor")
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            raise InvalidListParameter("limit must be an integer")
+        if limit <= 0:
+            raise InvalidListParameter("limit must be positive")
+        return min(limit, MAX_LIMIT)
+
+    def paginate(self, queryset, request, encoder=None):
+        """
+        Возвращает (объекты страницы, курсор следующей страницы или None).
+        С encoder (store.encoders.RowEncoder) страница — строки values_list(*encoder.columns).
+        """
+        limit = self.get_limit(request)
+        queryset = queryset.order_by(self.field, self.tiebreaker)
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            value, key = self.decode_cursor(cursor, queryset.model)
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__gt': value})
+                | Q(**{self.field: value, f'{self.tiebreaker}__gt': key})
+            )
+        if encoder is None:
+            page = list(queryset[:limit + 1])
+            cursor_of = attrgetter(self.field, self.tiebreaker)
+        else:
+            page = list(encoder.rows(queryset)[:limit + 1])
+            cursor_of = itemgetter(encoder.index(self.field), encoder.index(self.tiebreaker))
+        if len(page) <= limit:
+            return page, None
+        page = page[:limit]
+        return page, self.encode_cursor(*cursor_of(page[-1]))
+
+
+def parse_fields(request, serializer_class):
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    known = set(serializer_class().fields)
+    unknown = [name for name in fields if name not in known]
+    if unknown:
+        raise InvalidListParameter(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def ndjson_response(queryset, serializer):
+    """Потоковая выгрузка через серверный курсор: память не зависит от числа строк."""
+    encoder = JSONEncoder(ensure_ascii=False)
+
+    def rows():
+        for instance in queryset.iterator(chunk_size=STREAM_CHUNK_SIZE):
+            yield encoder.encode(serializer.to_representation(instance)) + "\n"
+
+    return StreamingHttpResponse(rows(), content_type="application/x-ndjson")
+
+
+def ndjson_rows_response(queryset, encoder):
+    """То же для быстрого пути: строки values_list() через RowEncoder."""
+
+    def rows():
+        encode = encoder.encode
+        for row in encoder.rows(queryset).iterator(chunk_size=STREAM_CHUNK_SIZE):
+            yield dumps(encode(row)) + "\n"
+
+    return StreamingHttpResponse(rows(), content_type="application/x-ndjson")
+
+
+def list_response(request, queryset, serializer_class, ordering=('added_at', 'id'), fast=False):
+    """
+    Общий ответ списковых эндпоинтов: fields=, keyset‑пагинация и stream=ndjson.
+    fast=True — строки через store.encoders.RowEncoder вместо сериализатора (тот же JSON);
+    для StoreItem в режиме STORE_EXPIRY 'annotated' queryset должен быть с with_expiry().
+    """
+    paginator = KeysetPagination(ordering)
+    try:
+        fields = parse_fields(request, serializer_class)
+        encoder = RowEncoder(fields, extra=ordering, serializer_class=serializer_class) if fast else None
+        if fields is not None and not fast:
+            queryset = queryset.only(*{*fields, *ordering} & {f.name for f in queryset.model._meta.concrete_fields})
+
+        if request.query_params.get('stream') == 'ndjson':
+            if fast:
+                return ndjson_rows_response(queryset.order_by(*ordering), encoder)
+            return ndjson_response(queryset.order_by(*ordering), serializer_class(fields=fields))
+
+        if paginator.is_requested(request):
+            page, next_cursor = paginator.paginate(queryset, request, encoder)
+            return Response({
+                "results": [encoder.encode(row) for row in page] if fast
+                else serializer_class(page, many=True, fields=fields).data,
+                "next_cursor": next_cursor,
+                "next": replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+                if next_cursor else None,
+            })
+    except InvalidListParameter as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if fast:
+        return Response(encoder.encode_all(queryset.order_by(*ordering)))
+    return Response(serializer_class(queryset.order_by(*ordering), many=True, fields=fields).data)
@@ -0,0 +1,56 @@
+"""
+JSON‑рендерер на orjson для горячих списков. orjson есть в requirements.txt, но импорт
+мягкий: без него FAST_RENDERER_CLASSES — обычные рендереры DRF.
+"""
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Компактный UTF‑8 JSON, как у JSONRenderer, с \\u2028/\\u2029 экранированными. Даты и Decimal,
+    которые orjson пишет иначе, отдаются в encoder DRF через OPT_PASSTHROUGH_DATETIME.
+    Побайтно совпадает с JSONRenderer на ответах из строк, целых, bool, None, дат и Decimal
+    (StoreItem); float orjson пишет по‑своему (1e16 вместо 1e+16, NaN как null).
+    Запросы с отступом (indent в Accept) и данные, которые orjson не пишет (целые шире 64 бит),
+    рендерит JSONRenderer.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        fallback = JSONRenderer()
+        if fallback.get_indent(accepted_media_type, renderer_context or {}):
+            return fallback.render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            return fallback.render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def dumps(data):
+    """Одна строка NDJSON‑выгрузки."""
+    if orjson is not None:
+        return ORJSONRenderer().render(data).decode()
+    return JSONEncoder(ensure_ascii=False).encode(data)
+
+
+if orjson is not None and api_settings.COMPACT_JSON and api_settings.UNICODE_JSON:
+    FAST_RENDERER_CLASSES = [ORJSONRenderer, BrowsableAPIRenderer]
+else:
+    FAST_RENDERER_CLASSES = list(api_settings.DEFAULT_RENDERER_CLASSES)
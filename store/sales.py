@@ -0,0 +1,66 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import SaleEvent, DailySales
+
+COMPACT_BATCH_SIZE = 10000
+
+EVENTS = SaleEvent._meta.db_table
+DAILY = DailySales._meta.db_table
+
+
+def record_sales(lines):
+    """
+    Пишет события продажи одной вставкой. lines — (строка витрины, quantity),
+    строка — dict с id, barcode, category, price, как её возвращают services.
+    """
+    now = timezone.now()
+    SaleEvent.objects.bulk_create([
+        SaleEvent(
+            store_item_id=product['id'], barcode=product['barcode'], category=product['category'],
+            quantity=quantity, price=product['price'], sold_at=now,
+        )
+        for product, quantity in lines
+    ])
+
+
+def compact_sales(batch_size=COMPACT_BATCH_SIZE):
+    """
+    Сворачивает пачку ещё не учтённых событий в DailySales одним запросом:
+    события помечаются rolled_up и их суммы прибавляются к дневным строкам.
+    SKIP LOCKED позволяет нескольким компакторам работать параллельно. Возвращает число событий.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH batch AS (
+                UPDATE {EVENTS} SET rolled_up = true
+                WHERE id IN (
+                    SELECT id FROM {EVENTS} WHERE NOT rolled_up
+                    ORDER BY id LIMIT %(limit)s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING sold_at, category, barcode, quantity, price
+            ), rolled AS (
+                INSERT INTO {DAILY} (date, category, barcode, quantity, revenue)
+                SELECT (sold_at AT TIME ZONE %(tz)s)::date, category, barcode,
+                       SUM(quantity), COALESCE(SUM(price * quantity), 0)
+                FROM batch
+                GROUP BY 1, 2, 3
+                ON CONFLICT (date, category, barcode)
+                DO UPDATE SET quantity = {DAILY}.quantity + EXCLUDED.quantity,
+                              revenue = {DAILY}.revenue + EXCLUDED.revenue
+            )
+            SELECT COUNT(*) FROM batch
+            """,
+            {'limit': batch_size, 'tz': timezone.get_current_timezone_name()},
+        )
+        return cursor.fetchone()[0]
+
+
+def compact_all_sales(batch_size=COMPACT_BATCH_SIZE):
+    total = 0
+    while True:
+        compacted = compact_sales(batch_size)
+        total += compacted
+        if compacted < batch_size:
+            return total
@@ -1,7 +1,25 @@
 from rest_framework import serializers
 from .models import StoreItem
 
-class StoreItemSerializer(serializers.ModelSerializer):
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer, который отдаёт только поля из fields=[...] (sparse fieldset)."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class StoreItemSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = StoreItem
         fields = '__all__'
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Режим STORE_EXPIRY 'annotated': просрочка посчитана в запросе (StoreItemQuerySet.with_expiry)
+        if 'is_expired' in data and hasattr(instance, 'expired_today'):
+            data['is_expired'] = instance.expired_today
+        return data
@@ -0,0 +1,232 @@
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+from .models import StoreItem
+from .cache import invalidate_barcodes
+from .sales import record_sales
+
+TABLE = StoreItem._meta.db_table
+
+NOT_ON = {
+    'warehouse': "Product is not on warehouse",
+    'showcase': "Product is not on store",
+}
+INSUFFICIENT = {
+    'warehouse': "Insufficient quantity on warehouse",
+    'showcase': "Insufficient quantity on store",
+}
+INVALID = "Invalid productId or quantity"
+
+
+class StockError(Exception):
+    """Нарушено бизнес‑правило перемещения; message уходит клиенту как есть."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _decrement(product_id, quantity, source, delete_when_empty):
+    """
+    Один UPDATE ... RETURNING: списывает quantity, только если строка в статусе source
+    и остатка хватает. Возвращает поля строки после списания.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {TABLE}
+            SET quantity = quantity - %(qty)s,
+                status = CASE WHEN %(delete)s AND quantity = %(qty)s THEN 'deleted' ELSE status END
+            WHERE id = %(id)s AND status = %(source)s AND quantity >= %(qty)s
+            RETURNING id, quantity, name, category, price, expire_date, is_expired, barcode, warehouse_upload_id
+            """,
+            {'qty': quantity, 'delete': delete_when_empty, 'id': product_id, 'source': source},
+        )
+        row = cursor.fetchone()
+    if row is not None:
+        columns = ('id', 'quantity', 'name', 'category', 'price', 'expire_date',
+                   'is_expired', 'barcode', 'warehouse_upload_id')
+        return dict(zip(columns, row))
+
+    # Ничего не списано: объясняем почему
+    current = StoreItem.objects.filter(id=product_id).values('status').first()
+    if current is None:
+        raise StockError(INVALID)
+    if current['status'] != source:
+        raise StockError(NOT_ON[source])
+    raise StockError(INSUFFICIENT[source])
+
+
+def _upsert_many(rows):
+    """
+    INSERT ... ON CONFLICT по уникальной строке (barcode, status): увеличивает количество
+    существующих строк или создаёт новые. rows — (product, status, quantity, warehouse_upload_id),
+    не больше одной строки на (barcode, status). Возвращает id строк в том же порядке.
+    """
+    now = timezone.now()
+    values = []
+    params = []
+    for product, status, quantity, warehouse_upload_id in rows:
+        values.append("(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)")
+        params.extend([product['name'], product['category'], quantity, product['price'], product['expire_date'],
+                       status, product['is_expired'], product['barcode'], now, warehouse_upload_id])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {TABLE}
+                (name, category, quantity, price, expire_date, status, is_expired, barcode, added_at, warehouse_upload_id)
+            VALUES {", ".join(values)}
+            ON CONFLICT (barcode, status) WHERE status IN ('warehouse', 'showcase', 'sold')
+            DO UPDATE SET quantity = {TABLE}.quantity + EXCLUDED.quantity
+            RETURNING id
+            """,
+            params,
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _upsert(product, status, quantity, warehouse_upload_id):
+    return _upsert_many([(product, status, quantity, warehouse_upload_id)])[0]
+
+
+def _validate_quantity(quantity):
+    try:
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        raise StockError(INVALID)
+    if quantity <= 0:
+        raise StockError(INVALID)
+    return quantity
+
+
+def _validate_product_id(product_id):
+    # До SQL: нечисловой id иначе дошёл бы до PostgreSQL и упал с DataError
+    try:
+        return int(product_id)
+    except (TypeError, ValueError):
+        raise StockError(INVALID)
+
+
+def move_stock(product_id, quantity, source, target):
+    """
+    Атомарно перемещает quantity единиц товара из статуса source в target.
+    Возвращает строку‑получатель.
+    """
+    product_id = _validate_product_id(product_id)
+    quantity = _validate_quantity(quantity)
+    with transaction.atomic():
+        product = _decrement(product_id, quantity, source, delete_when_empty=False)
+        target_id = None
+        if product['quantity'] == 0:
+            # Перемещаем строку целиком, если в target ещё нет строки с этим штрих‑кодом
+            try:
+                with transaction.atomic():
+                    StoreItem.objects.filter(id=product['id']).update(status=target, quantity=quantity)
+                target_id = product['id']
+            except IntegrityError:
+                StoreItem.objects.filter(id=product['id']).update(status='deleted')
+        if target_id is None:
+            target_id = _upsert(product, target, quantity, product['warehouse_upload_id'])
+        transaction.on_commit(lambda: invalidate_barcodes(product['barcode']))
+    return StoreItem.objects.get(id=target_id)
+
+
+def sell(product_id, quantity=1):
+    """Атомарно продаёт quantity единиц с витрины. Возвращает id sold‑строки."""
+    product_id = _validate_product_id(product_id)
+    quantity = _validate_quantity(quantity)
+    with transaction.atomic():
+        product = _decrement(product_id, quantity, 'showcase', delete_when_empty=True)
+        sold_id = _upsert(product, 'sold', quantity, None)
+        record_sales([(product, quantity)])
+        transaction.on_commit(lambda: invalidate_barcodes(product['barcode']))
+    return sold_id
+
+
+def _lock_showcase_rows(product_ids, barcodes):
+    """Один SELECT ... FOR UPDATE по всем строкам корзины (в порядке id, чтобы не было дедлоков)."""
+    condition = Q(id__in=product_ids) | Q(barcode__in=barcodes)
+    rows = (
+        StoreItem.objects.select_for_update()
+        .filter(condition, status='showcase')
+        .order_by('id')
+        .values('id', 'quantity', 'name', 'category', 'price', 'expire_date',
+                'is_expired', 'barcode', 'warehouse_upload_id')
+    )
+    by_id, by_barcode = {}, {}
+    for row in rows:
+        by_id[row['id']] = row
+        by_barcode.setdefault(row['barcode'], row)
+    return by_id, by_barcode
+
+
+def checkout(lines):
+    """
+    Продажа корзины за постоянное число запросов: блокировка всех строк, один UPDATE
+    списания, один upsert sold‑строк и одна вставка событий продажи. lines — [{"barcode" | "productId", "quantity"}].
+    Ошибочные строки корзины не продаются; возвращает результат по каждой строке.
+    """
+    results = []
+    parsed = []
+    for position, line in enumerate(lines):
+        result = {"line": position, "productId": None, "barcode": None, "quantity": None}
+        results.append(result)
+        if not isinstance(line, dict):
+            result.update(status="error", error="Line must be an object")
+            continue
+        result.update(productId=line.get("productId"), barcode=line.get("barcode"))
+        try:
+            quantity = _validate_quantity(line.get("quantity", 1))
+            product_id = int(line["productId"]) if line.get("productId") is not None else None
+        except (StockError, TypeError, ValueError):
+            result.update(status="error", error=INVALID)
+            continue
+        if product_id is None and not line.get("barcode"):
+            result.update(status="error", error="productId or barcode is required")
+            continue
+        result["quantity"] = quantity
+        parsed.append((result, product_id, str(line["barcode"]) if product_id is None else None, quantity))
+
+    if not parsed:
+        return results
+
+    with transaction.atomic():
+        by_id, by_barcode = _lock_showcase_rows(
+            [product_id for _, product_id, _, _ in parsed if product_id is not None],
+            [barcode for _, _, barcode, _ in parsed if barcode is not None],
+        )
+        remaining = {row_id: row['quantity'] for row_id, row in by_id.items()}
+        taken = {}
+        for result, product_id, barcode, quantity in parsed:
+            row = by_id.get(product_id) if product_id is not None else by_barcode.get(barcode)
+            if row is None:
+                result.update(status="error", error="Product not found on showcase")
+                continue
+            if remaining[row['id']] < quantity:
+                result.update(status="error", error=INSUFFICIENT['showcase'])
+                continue
+            remaining[row['id']] -= quantity
+            taken[row['id']] = taken.get(row['id'], 0) + quantity
+            result.update(status="sold", productId=row['id'], barcode=row['barcode'],
+                          price=str(row['price']) if row['price'] is not None else None)
+
+        if taken:
+            values = ", ".join(["(%s, %s)"] * len(taken))
+            params = [value for pair in taken.items() for value in pair]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {TABLE} AS item
+                    SET quantity = item.quantity - basket.qty,
+                        status = CASE WHEN item.quantity = basket.qty THEN 'deleted' ELSE item.status END
+                    FROM (VALUES {values}) AS basket (id, qty)
+                    WHERE item.id = basket.id
+                    """,
+                    params,
+                )
+            _upsert_many([(by_id[row_id], 'sold', quantity, None) for row_id, quantity in taken.items()])
+            record_sales([(by_id[row_id], quantity) for row_id, quantity in taken.items()])
+            barcodes = [by_id[row_id]['barcode'] for row_id in taken]
+            transaction.on_commit(lambda: invalidate_barcodes(*barcodes))
+    return results
@@ -1,46 +1,43 @@
 from celery import shared_task
-from django.core.mail import send_mail
-from django.utils import timezone
-from store.models import StoreItem
+from django.conf import settings
+from django.utils.dateparse import parse_date
+from store.expiry import refresh_expired_flags as refresh_flags, remove_expired
+from store.markdown import apply_markdowns
+from store.notifications import send_expiry_digests
+from store.sales import compact_all_sales
 
 @shared_task
 def send_expiry_notifications():
-    today = timezone.now().date()
-    notified_count = 0
-    expired_count = 0
-    products = StoreItem.objects.filter(status__in=['warehouse', 'showcase'])
-    for product in products:
-        full_lifetime = (product.expire_date - product.added_at.date()).days
-        if full_lifetime <= 0:
-            continue
-        remaining_days = (product.expire_date - today).days
-        if remaining_days <= 0:
-            if product.warehouse_upload and product.warehouse_upload.uploaded_by:
-                recipient = product.warehouse_upload.uploaded_by.email
-                send_mail(
-                    subject=f"Product Expired: {product.name}",
-                    message=(
-                        f"Dear user,\n\nThe product '{product.name}' expired on {product.expire_date}.\n"
-                        "Please take necessary actions."
-                    ),
-                    from_email='nurmeksdu@gmail.com',
-                    recipient_list=[recipient],
-                    fail_silently=False,
-                )
-                expired_count += 1
-        elif (remaining_days / full_lifetime) <= 0.3:
-            if product.warehouse_upload and product.warehouse_upload.uploaded_by:
-                recipient = product.warehouse_upload.uploaded_by.email
-                send_mail(
-                    subject=f"Expiry Warning for {product.name}",
-                    message=(
-                        f"Dear user,\n\nThe product '{product.name}' is nearing its expiration date ({product.expire_date}). "
-                        f"It has only {remaining_days} days left, which is less than 30% of its total shelf life.\n\n"
-                        "Please take necessary actions."
-                    ),
-                    from_email='maxsatul2007@gmail.com',
-                    recipient_list=[recipient],
-                    fail_silently=False,
-                )
-                notified_count += 1
-    return f"Expiry notifications sent for {notified_count} products; Expiry alerts sent for {expired_count} expired products."
+    notified_count, expired_count, digests = send_expiry_digests()
+    return (
+        f"Expiry notifications sent for {notified_count} products; Expiry alerts sent for {expired_count} "
+        f"expired products in {digests} queued digest emails."
+    )
+
+
+@shared_task
+def compact_daily_sales():
+    return f"Compacted {compact_all_sales()} sale events into daily sales"
+
+
+@shared_task
+def refresh_expired_flags():
+    return refresh_flags()
+
+
+@shared_task
+def remove_expired_stock(dry_run=False, category=None, upload_id=None, expired_from=None, expired_to=None,
+                         scheduled=False):
+    # Из beat задача приходит с scheduled=True и выполняется, только если автосписание включено
+    if scheduled and not settings.STORE_EXPIRY['AUTO_REMOVE']:
+        return "Automatic write-off is disabled"
+    return remove_expired(
+        dry_run=dry_run, category=category, upload_id=upload_id,
+        expired_from=parse_date(expired_from) if expired_from else None,
+        expired_to=parse_date(expired_to) if expired_to else None,
+    )
+
+
+@shared_task
+def apply_markdown_rules():
+    return apply_markdowns()
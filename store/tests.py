@@ -1,3 +1,426 @@
-from django.test import TestCase
+from django.core import mail
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from datetime import date, timedelta
+from decimal import Decimal
+import json
+from accounts.mail import flush_outbox
+from accounts.models import User
+from .barcodes import BarcodeAllocator, allocate_barcodes, is_valid_ean13
+from .cache import scan_cache
+from .encoders import RowEncoder
+from .models import StoreItem, SaleEvent, DailySales, MarkdownRule, PriceChange
+from .renderers import ORJSONRenderer, orjson
+from .sales import compact_sales
+from .serializers import StoreItemSerializer
+from .tasks import send_expiry_notifications, refresh_expired_flags
+from warehouse_app.models import Upload
+from .services import move_stock, sell, checkout, StockError
+from concurrent.futures import ThreadPoolExecutor
 
-# Create your tests here.
+
+class BarcodeAllocatorTests(TestCase):
+    def test_block_allocation(self):
+        allocator = BarcodeAllocator(block_size=10)
+        with self.assertNumQueries(1):
+            first = allocator.allocate(25)
+        with self.assertNumQueries(0):
+            second = allocator.allocate(5)
+
+        codes = first + second
+        self.assertEqual(len(set(codes)), 30)
+        self.assertTrue(all(is_valid_ean13(code) for code in codes))
+        self.assertTrue(is_valid_ean13('4006381333931'))
+
+    def test_mixed_block_sizes_do_not_overlap(self):
+        # Каждый вызов забирает новый блок: при номере блока * block_size диапазоны пересекались
+        small, large = BarcodeAllocator(block_size=1000), BarcodeAllocator(block_size=2000)
+        codes = []
+        for _ in range(5):
+            codes += small.allocate(1000) + large.allocate(2000) + allocate_barcodes(5)
+        self.assertEqual(len(set(codes)), len(codes))
+
+
+class ScanCacheTests(APITestCase):
+    def setUp(self):
+        scan_cache.clear()
+        self.user = User.objects.create_user(
+            email='cashier@example.com', username='cashier', password='strong_password_123', role='manager'
+        )
+        self.client.force_authenticate(self.user)
+        self.item = StoreItem.objects.create(
+            name='Milk', category='Dairy', quantity=5, price=Decimal('1.50'),
+            expire_date=date(2030, 1, 1), status='showcase',
+        )
+
+    def test_scan_is_served_from_cache_and_invalidated_on_sell(self):
+        url = reverse('scan-barcode', args=[self.item.barcode])
+        self.assertEqual(self.client.get(url).data['quantity'], 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data['quantity'], 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('sell-product'), {'productId': self.item.id, 'quantity': 2}, format='json')
+        self.assertEqual(self.client.get(url).data['quantity'], 3)
+
+    def test_scan_basket(self):
+        response = self.client.post(
+            reverse('scan-basket'), {'barcodes': [self.item.barcode, 'missing']}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['items']), [self.item.barcode])
+        self.assertEqual(response.data['not_found'], ['missing'])
+
+
+class StockMovementTests(TestCase):
+    def setUp(self):
+        self.item = StoreItem.objects.create(
+            name='Tea', category='Drinks', quantity=10, price=Decimal('3.00'),
+            expire_date=date(2030, 1, 1), status='warehouse',
+        )
+
+    def test_partial_and_full_moves_share_one_showcase_row(self):
+        showcase = move_stock(self.item.id, 4, source='warehouse', target='showcase')
+        self.assertNotEqual(showcase.id, self.item.id)
+        self.assertEqual(showcase.quantity, 4)
+
+        merged = move_stock(self.item.id, 6, source='warehouse', target='showcase')
+        self.assertEqual((merged.id, merged.quantity), (showcase.id, 10))
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.status, self.item.quantity), ('deleted', 0))
+
+    def test_rejected_moves(self):
+        with self.assertRaisesMessage(StockError, 'Insufficient quantity on warehouse'):
+            move_stock(self.item.id, 11, source='warehouse', target='showcase')
+        with self.assertRaisesMessage(StockError, 'Product is not on store'):
+            sell(self.item.id, 1)
+        with self.assertRaisesMessage(StockError, 'Invalid productId or quantity'):
+            move_stock(self.item.id, -1, source='warehouse', target='showcase')
+        for product_id in ('abc', '1.5', None):
+            with self.assertRaisesMessage(StockError, 'Invalid productId or quantity'):
+                move_stock(product_id, 1, source='warehouse', target='showcase')
+            with self.assertRaisesMessage(StockError, 'Invalid productId or quantity'):
+                sell(product_id, 1)
+
+
+class CheckoutTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='till@example.com', username='till', password='strong_password_123', role='manager'
+        )
+        self.client.force_authenticate(self.user)
+        self.items = [
+            StoreItem.objects.create(
+                name=f'Item {pos}', quantity=3, price=Decimal('2.00'),
+                expire_date=date(2030, 1, 1), status='showcase',
+            )
+            for pos in range(5)
+        ]
+
+    def test_non_numeric_product_id_is_rejected(self):
+        response = self.client.post(reverse('sell-product'), {'productId': 'abc'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('transfer-to-warehouse'), {'productId': '1.5', 'quantity': 1},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_basket_in_constant_queries(self):
+        lines = [{'barcode': item.barcode, 'quantity': 1} for item in self.items]
+        lines += [{'productId': self.items[0].id, 'quantity': 2}, {'barcode': 'missing'},
+                  {'productId': self.items[1].id, 'quantity': 5}]
+        # SAVEPOINT/RELEASE + SELECT ... FOR UPDATE + UPDATE + INSERT ... ON CONFLICT + INSERT событий
+        with self.assertNumQueries(6):
+            response = self.client.post(reverse('checkout'), {'lines': lines}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['sold'], response.data['failed']), (6, 2))
+        self.assertEqual(
+            [r.get('error') for r in response.data['results'][-2:]],
+            ['Product not found on showcase', 'Insufficient quantity on store'],
+        )
+
+        first = StoreItem.objects.get(id=self.items[0].id)
+        self.assertEqual((first.quantity, first.status), (0, 'deleted'))
+        sold = StoreItem.objects.get(barcode=self.items[0].barcode, status='sold')
+        self.assertEqual(sold.quantity, 3)
+        self.assertEqual(StoreItem.objects.get(id=self.items[1].id).quantity, 2)
+
+
+class SalesLedgerTests(TestCase):
+    def test_sales_are_rolled_up_by_day(self):
+        item = StoreItem.objects.create(
+            name='Juice', category='Drinks', quantity=10, price=Decimal('2.50'),
+            expire_date=date(2030, 1, 1), status='showcase',
+        )
+        sell(item.id, 2)
+        checkout([{'barcode': item.barcode, 'quantity': 3}])
+        self.assertEqual(SaleEvent.objects.filter(store_item=item).count(), 2)
+
+        self.assertEqual(compact_sales(batch_size=1), 1)
+        self.assertEqual(compact_sales(), 1)
+        self.assertEqual(compact_sales(), 0)
+        daily = DailySales.objects.get(barcode=item.barcode)
+        self.assertEqual((daily.category, daily.quantity, daily.revenue), ('Drinks', 5, Decimal('12.50')))
+
+
+class ExpiryDigestTests(TestCase):
+    def test_one_digest_per_recipient(self):
+        today = date.today()
+        for pos in range(2):
+            user = User.objects.create_user(
+                email=f'owner{pos}@example.com', username=f'owner{pos}', password='strong_password_123'
+            )
+            upload = Upload.objects.create(file_name=f'file{pos}.csv', uploaded_by=user, status=Upload.STATUS_DONE)
+            for name, expire_date in [('Expired', today - timedelta(days=1)), ('Expiring', today + timedelta(days=2)),
+                                      ('Fresh', today + timedelta(days=365))]:
+                StoreItem.objects.create(
+                    name=name, quantity=1, price=Decimal('1.00'), expire_date=expire_date,
+                    status='warehouse', warehouse_upload=upload,
+                )
+        # Срок годности истёк ещё до поступления — такие товары пропускаются
+        StoreItem.objects.filter(name='Expired', warehouse_upload__uploaded_by__email='owner1@example.com').update(
+            added_at=timezone.now() - timedelta(days=30), expire_date=today - timedelta(days=40),
+        )
+        StoreItem.objects.filter(name__in=['Expired', 'Expiring'], warehouse_upload__uploaded_by__email='owner0@example.com').update(
+            added_at=timezone.now() - timedelta(days=10),
+        )
+        StoreItem.objects.filter(name='Expiring', warehouse_upload__uploaded_by__email='owner1@example.com').update(
+            added_at=timezone.now() - timedelta(days=30),
+        )
+
+        # SAVEPOINT + SET LOCAL + один SELECT + RELEASE, затем SAVEPOINT + один INSERT в очередь + RELEASE
+        with self.assertNumQueries(7):
+            result = send_expiry_notifications()
+        self.assertIn('for 2 products', result)
+        self.assertIn('for 1 expired', result)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(flush_outbox(), (2, 0))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['owner0@example.com', 'owner1@example.com'])
+        self.assertIn('Expired', mail.outbox[0].body)
+        self.assertNotIn('Fresh', mail.outbox[0].body)
+
+
+class ExpiredFlagTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='clerk@example.com', username='clerk', password='strong_password_123', role='manager'
+        )
+        self.client.force_authenticate(self.user)
+        self.item = StoreItem.objects.create(
+            name='Yogurt', quantity=1, price=Decimal('1.00'), expire_date=date.today() + timedelta(days=1),
+            status='showcase',
+        )
+        # Срок прошёл после сохранения: флаг ещё не пересчитан
+        StoreItem.objects.filter(id=self.item.id).update(expire_date=date.today() - timedelta(days=1))
+
+    def test_nightly_batches_flag_stale_rows(self):
+        for pos in range(4):
+            StoreItem.objects.create(
+                name=f'Old {pos}', quantity=1, expire_date=date.today() + timedelta(days=1), status='warehouse',
+            )
+        StoreItem.objects.filter(name__startswith='Old').update(expire_date=date.today() - timedelta(days=3))
+        with self.settings(STORE_EXPIRY={'MODE': 'stored', 'BATCH_SIZE': 2}):
+            metrics = refresh_expired_flags()
+        self.assertEqual((metrics['flagged'], metrics['batches']), (5, 3))
+        self.assertEqual(refresh_expired_flags()['flagged'], 0)
+        self.assertFalse(StoreItem.objects.filter(is_expired=False, expire_date__lt=date.today()).exists())
+
+    def test_corrected_expire_date_clears_flag(self):
+        refresh_expired_flags()
+        self.item.refresh_from_db()
+        self.assertTrue(self.item.is_expired)
+
+        self.item.expire_date = date.today() + timedelta(days=5)
+        self.item.save(update_fields=['expire_date'])
+        self.item.refresh_from_db()
+        self.assertFalse(self.item.is_expired)
+
+    def test_remove_and_annotated_mode_use_expire_date(self):
+        with override_settings(STORE_EXPIRY={'MODE': 'annotated', 'BATCH_SIZE': 10}):
+            listed = self.client.get(reverse('store-items')).data
+        self.assertEqual([row['is_expired'] for row in listed], [True])
+        self.assertFalse(self.client.get(reverse('store-items')).data[0]['is_expired'])
+
+        response = self.client.post(reverse('remove-item'), {'productId': self.item.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.status, self.item.is_expired), ('deleted', True))
+
+
+class BulkWriteOffTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='auditor@example.com', username='auditor', password='strong_password_123', role='manager'
+        )
+        self.client.force_authenticate(self.user)
+        for pos, (category, status_) in enumerate([('Dairy', 'showcase'), ('Dairy', 'warehouse'),
+                                                   ('Meat', 'warehouse'), ('Meat', 'sold')]):
+            StoreItem.objects.create(
+                name=f'Item {pos}', category=category, quantity=2, price=Decimal('3.00'),
+                expire_date=date.today() - timedelta(days=pos + 1), status=status_,
+            )
+        StoreItem.objects.create(
+            name='Fresh', category='Dairy', quantity=1, price=Decimal('1.00'),
+            expire_date=date.today() + timedelta(days=5), status='showcase',
+        )
+        self.url = reverse('remove-expired')
+
+    def test_dry_run_then_chunked_write_off(self):
+        preview = self.client.post(self.url, {'dryRun': True}, format='json').data
+        self.assertEqual((preview['rows'], preview['quantity'], preview['value']), (3, 6, '18.00'))
+        self.assertEqual(StoreItem.objects.filter(status='deleted').count(), 0)
+
+        with self.settings(STORE_EXPIRY={'MODE': 'stored', 'BATCH_SIZE': 2, 'AUTO_REMOVE': True}):
+            with self.captureOnCommitCallbacks(execute=True):
+                report = self.client.post(self.url, {'category': 'Dairy'}, format='json').data
+            self.assertEqual((report['rows'], report['batches']), (2, 2))
+            self.assertEqual(report['by_category'], [{'category': 'Dairy', 'rows': 2, 'quantity': 4, 'value': '12.00'}])
+            self.assertEqual(self.client.post(self.url, {}, format='json').data['rows'], 1)
+
+        self.assertEqual(set(StoreItem.objects.exclude(status='deleted').values_list('name', flat=True)),
+                         {'Item 3', 'Fresh'})
+        bad = self.client.post(self.url, {'expiredFrom': '18.10.2026'}, format='json')
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MarkdownTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='pricing@example.com', username='pricing', password='strong_password_123', role='manager'
+        )
+        self.client.force_authenticate(self.user)
+        self.items = {}
+        for name, category, price, days, status_ in [
+            ('Yogurt', 'Dairy', '10.00', 2, 'showcase'),
+            ('Cheese', 'Dairy', '10.00', 20, 'showcase'),
+            ('Sausage', 'Meat', '4.00', 1, 'showcase'),
+            ('Old milk', 'Dairy', '10.00', -1, 'showcase'),
+            ('Stored milk', 'Dairy', '10.00', 1, 'warehouse'),
+        ]:
+            self.items[name] = StoreItem.objects.create(
+                name=name, category=category, quantity=1, price=Decimal(price),
+                expire_date=date.today() + timedelta(days=days), status=status_,
+            )
+        StoreItem.objects.update(added_at=timezone.now() - timedelta(days=10))
+
+    def price(self, name):
+        return StoreItem.objects.get(pk=self.items[name].pk).price
+
+    def test_rules_apply_from_base_price_and_record_history(self):
+        MarkdownRule.objects.create(name='Dairy soon', category='Dairy', expires_within_days=3,
+                                    discount_percentage=20, rounding='ending_99')
+        MarkdownRule.objects.create(name='Last 30%', shelf_life_left=Decimal('0.30'), discount_percentage=50)
+        url = reverse('apply-markdown')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report = self.client.post(url, {}, format='json').data
+        self.assertEqual([rule['items'] for rule in report['rules']], [2, 0])
+        self.assertEqual((self.price('Yogurt'), self.price('Sausage')), (Decimal('5.00'), Decimal('2.00')))
+        self.assertEqual(self.price('Cheese'), Decimal('10.00'))
+        self.assertEqual((self.price('Old milk'), self.price('Stored milk')), (Decimal('10.00'), Decimal('10.00')))
+        self.assertEqual(self.client.post(url, {}, format='json').data['items'], 0)
+
+        discount = self.client.post(reverse('apply-discount'), {
+            'storeItemId': self.items['Cheese'].pk, 'discountPercentage': 10,
+        }, format='json')
+        self.assertEqual(discount.data['new_price'], '9.00')
+        rule = MarkdownRule.objects.create(name='Dairy month', category='Dairy', expires_within_days=30,
+                                           discount_percentage=15, rounding='down_10')
+        self.assertEqual(self.client.post(url, {'ruleIds': [rule.id]}, format='json').data['items'], 1)
+        self.assertEqual(self.price('Cheese'), Decimal('8.50'))
+
+        history = PriceChange.objects.filter(store_item=self.items['Cheese']).order_by('id')
+        self.assertEqual([(h.reason, h.old_price, h.new_price) for h in history],
+                         [('manual', Decimal('10.00'), Decimal('9.00')), ('markdown', Decimal('9.00'), Decimal('8.50'))])
+        self.assertEqual(PriceChange.objects.filter(reason='markdown').count(), 3)
+
+
+class ListEndpointTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='lister@example.com', username='lister', password='strong_password_123', role='manager'
+        )
+        self.client.force_authenticate(self.user)
+        for pos in range(5):
+            StoreItem.objects.create(
+                name=f'Item {pos}', quantity=1, price=Decimal('1.00'),
+                expire_date=date(2030, 1, 1), status='showcase',
+            )
+        self.url = reverse('store-items')
+
+    def test_keyset_pages_cover_all_rows(self):
+        seen = []
+        response = self.client.get(self.url, {'limit': 2, 'fields': 'id,name'})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [row['id'] for row in response.data['results']]
+            self.assertTrue(all(set(row) == {'id', 'name'} for row in response.data['results']))
+            if response.data['next_cursor'] is None:
+                break
+            response = self.client.get(self.url, {'limit': 2, 'fields': 'id,name',
+                                                  'cursor': response.data['next_cursor']})
+        self.assertEqual(seen, list(StoreItem.objects.order_by('added_at', 'id').values_list('id', flat=True)))
+
+    def test_ndjson_stream_and_bad_parameters(self):
+        response = self.client.get(self.url, {'stream': 'ndjson', 'fields': 'barcode'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(set(json.loads(lines[0])), {'barcode'})
+
+        self.assertEqual(self.client.get(self.url, {'cursor': 'garbage'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'fields': 'nope'}).status_code, status.HTTP_400_BAD_REQUEST)
+        # Без limit/cursor — прежний формат: весь список
+        self.assertEqual(len(self.client.get(self.url).data), 5)
+
+    def test_fast_path_matches_serializer(self):
+        StoreItem.objects.create(name='Творог\u2028', quantity=2, category='dairy', expire_date=date(2030, 1, 2),
+                                 status='showcase', price=Decimal('3.5'))
+        items = StoreItem.objects.filter(status='showcase').with_expiry().order_by('added_at', 'id')
+        for fields in (None, ['id', 'price', 'added_at', 'is_expired']):
+            expected = StoreItemSerializer(items, many=True, fields=fields).data
+            self.assertEqual(RowEncoder(fields).encode_all(items), expected)
+            if orjson is not None:
+                self.assertEqual(ORJSONRenderer().render(expected), JSONRenderer().render(expected))
+
+        response = self.client.get(self.url, {'limit': 4})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content)['results'],
+                         json.loads(JSONRenderer().render(StoreItemSerializer(items[:4], many=True).data)))
+
+    def test_orjson_renderer_falls_back_to_json_renderer(self):
+        if orjson is None:
+            self.skipTest("orjson is not installed")
+        data = {1: 'one', 'big': 2 ** 70, 'text': 'Молоко'}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = ORJSONRenderer().render({'id': 1}, 'application/json; indent=4')
+        self.assertEqual(indented, JSONRenderer().render({'id': 1}, 'application/json; indent=4'))
+
+        response = self.client.get(self.url, HTTP_ACCEPT='application/json; indent=2')
+        self.assertTrue(response.content.startswith(b'[\n  {'))
+
+
+class ConcurrentSellTests(TransactionTestCase):
+    def test_no_lost_updates(self):
+        item = StoreItem.objects.create(
+            name='Water', quantity=40, price=Decimal('1.00'), expire_date=date(2030, 1, 1), status='showcase',
+        )
+
+        def worker():
+            try:
+                for _ in range(10):
+                    sell(item.id, 1)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            for future in [pool.submit(worker) for _ in range(4)]:
+                future.result()
+
+        item.refresh_from_db()
+        self.assertEqual((item.quantity, item.status), (0, 'deleted'))
+        sold = StoreItem.objects.get(barcode=item.barcode, status='sold')
+        self.assertEqual(sold.quantity, 40)
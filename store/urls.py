@@ -1,11 +1,15 @@
 from django.urls import path
-from .views import StoreItemListView, DiscountView, RemoveExpiredView, SellStoreItemView, TransferToWarehouseView, ScanBarcodeView
+from .views import StoreItemListView, DiscountView, RemoveExpiredView, RemoveExpiredBulkView, MarkdownView, SellStoreItemView, CheckoutView, TransferToWarehouseView, ScanBarcodeView, ScanBasketView
 
 urlpatterns = [
     path('items', StoreItemListView.as_view(), name='store-items'),
     path('discount', DiscountView.as_view(), name='apply-discount'),
     path('remove', RemoveExpiredView.as_view(), name='remove-item'),
+    path('remove-expired', RemoveExpiredBulkView.as_view(), name='remove-expired'),
+    path('markdown', MarkdownView.as_view(), name='apply-markdown'),
     path('transfer-to-warehouse', TransferToWarehouseView.as_view(), name='transfer-to-warehouse'),
     path('sell', SellStoreItemView.as_view(), name='sell-product'),
+    path('checkout', CheckoutView.as_view(), name='checkout'),
+    path('scan', ScanBasketView.as_view(), name='scan-basket'),
     path('scan/<str:barcode>', ScanBarcodeView.as_view(), name='scan-barcode'),
 ]
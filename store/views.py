@@ -2,26 +2,38 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from .models import StoreItem
+from .models import StoreItem, PriceChange
 from .serializers import StoreItemSerializer
+from .cache import get_showcase_item, get_showcase_items, invalidate_barcodes
+from .services import move_stock, sell, checkout, StockError
+from .pagination import list_response, LIST_PARAMETERS
+from .renderers import FAST_RENDERER_CLASSES
+from .expiry import remove_expired
+from .markdown import apply_markdowns
 from accounts.permissions import IsManager
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from decimal import Decimal
+import uuid
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from django.utils import timezone
+
+MAX_BASKET_SIZE = 500
 
 class StoreItemListView(APIView):
     permission_classes = [IsAuthenticated, IsManager]
+    renderer_classes = FAST_RENDERER_CLASSES
 
     @swagger_auto_schema(
         security=[{"Bearer": []}],
         tags=["Store"],
         operation_summary="Все товары на витрине",
+        manual_parameters=LIST_PARAMETERS,
     )
     def get(self, request):
-        items = StoreItem.objects.filter(status="showcase")
-        serializer = StoreItemSerializer(items, many=True)
-        return Response(serializer.data)
+        items = StoreItem.objects.filter(status="showcase").with_expiry()
+        return list_response(request, items, StoreItemSerializer, fast=True)
 
 class DiscountView(APIView):
     permission_classes = [IsAuthenticated, IsManager]
@@ -69,9 +81,15 @@ class DiscountView(APIView):
         except Exception:
             return Response({"error": "Invalid discountPercentage"}, status=status.HTTP_400_BAD_REQUEST)
 
-        new_price = old_price * (Decimal('1') - discount_decimal / Decimal('100'))
-        item.price = new_price
-        item.save()
+        new_price = (old_price * (Decimal('1') - discount_decimal / Decimal('100'))).quantize(Decimal('0.01'))
+        with transaction.atomic():
+            item.price = new_price
+            item.save(update_fields=['price'])
+            PriceChange.objects.create(
+                store_item=item, barcode=item.barcode, reason='manual',
+                old_price=old_price, new_price=new_price, changed_by_id=request.user.id,
+            )
+        invalidate_barcodes(item.barcode)
 
         return Response(
             {
@@ -104,14 +122,89 @@ class RemoveExpiredView(APIView):
         except StoreItem.DoesNotExist:
             return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        if not product.is_expired:
+        # Проверяем по дате: флаг is_expired обновляется раз в сутки
+        if product.expire_date >= timezone.now().date():
             return Response({"error": "Product is not expired"}, status=status.HTTP_400_BAD_REQUEST)
 
         product.status = 'deleted'
-        product.save()
+        product.is_expired = True
+        product.save(update_fields=['status', 'is_expired'])
+        invalidate_barcodes(product.barcode)
         return Response({"message": "Product deleted (moved to trash)"}, status=status.HTTP_200_OK)
 
 
+class RemoveExpiredBulkView(APIView):
+    permission_classes = [IsAuthenticated, IsManager]
+
+    @swagger_auto_schema(
+        security=[{"Bearer": []}],
+        tags=["Store"],
+        operation_summary="Списать все просроченные товары",
+        operation_description="Переводит просроченные товары склада и витрины в deleted пачками. "
+                              "dryRun=true только считает, что будет списано.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "category": openapi.Schema(type=openapi.TYPE_STRING),
+                "uploadId": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                "expiredFrom": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+                "expiredTo": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+                "dryRun": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+            },
+        ),
+        responses={200: openapi.Response("Отчёт о списании"), 400: "Invalid filter"},
+    )
+    def post(self, request):
+        filters = {}
+        if request.data.get("category"):
+            filters["category"] = str(request.data["category"])
+        if request.data.get("uploadId"):
+            try:
+                filters["upload_id"] = uuid.UUID(str(request.data["uploadId"]))
+            except ValueError:
+                return Response({"error": "Invalid uploadId"}, status=status.HTTP_400_BAD_REQUEST)
+        for field, name in (("expiredFrom", "expired_from"), ("expiredTo", "expired_to")):
+            if request.data.get(field):
+                try:
+                    filters[name] = parse_date(str(request.data[field]))
+                except ValueError:
+                    filters[name] = None
+                if filters[name] is None:
+                    return Response({"error": f"Invalid {field}, expected YYYY-MM-DD"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = str(request.data.get("dryRun", "")).lower() in ("true", "1")
+        report = remove_expired(dry_run=dry_run, **filters)
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class MarkdownView(APIView):
+    permission_classes = [IsAuthenticated, IsManager]
+
+    @swagger_auto_schema(
+        security=[{"Bearer": []}],
+        tags=["Store"],
+        operation_summary="Уценка витрины по правилам",
+        operation_description="Применяет активные правила уценки (все или ruleIds) ко всей витрине, "
+                              "каждое правило — одним запросом. Изменения цен пишутся в историю.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "ruleIds": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER)),
+            },
+        ),
+        responses={200: openapi.Response("Уценено товаров по правилам"), 400: "Invalid ruleIds"},
+    )
+    def post(self, request):
+        rule_ids = request.data.get("ruleIds")
+        if rule_ids is not None:
+            try:
+                rule_ids = [int(rule_id) for rule_id in rule_ids]
+            except (TypeError, ValueError):
+                return Response({"error": "ruleIds must be a list of integers"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(apply_markdowns(rule_ids, user=request.user), status=status.HTTP_200_OK)
+
+
 class TransferToWarehouseView(APIView):
     permission_classes = [IsAuthenticated, IsManager]
 
@@ -145,42 +238,9 @@ class TransferToWarehouseView(APIView):
                             status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            transfer_quantity = int(transfer_quantity)
-            product = StoreItem.objects.get(id=product_id)
-        except (StoreItem.DoesNotExist, ValueError):
-            return Response({"error": "Invalid productId or quantity"},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        if product.status != "showcase":
-            return Response({"error": "Product is not on store"},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        if product.quantity < transfer_quantity:
-            return Response({"error": "Insufficient quantity on store"},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        if product.quantity == transfer_quantity:
-            product.status = "warehouse"
-            product.save()
-            target_item = product
-        else:
-            product.quantity -= transfer_quantity
-            product.save()
-
-            target_item, _ = StoreItem.objects.get_or_create(
-                barcode=product.barcode,
-                status="warehouse",
-                defaults={
-                    "name":      product.name,
-                    "category":  product.category,
-                    "quantity":  0,
-                    "price":     product.price,
-                    "expire_date": product.expire_date,
-                    "warehouse_upload": product.warehouse_upload,
-                },
-            )
-            target_item.quantity += transfer_quantity
-            target_item.save()
+            target_item = move_stock(product_id, transfer_quantity, source="showcase", target="warehouse")
+        except StockError as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
 
         serializer = StoreItemSerializer(target_item)
         return Response(
@@ -215,44 +275,62 @@ class SellStoreItemView(APIView):
             return Response({"error": "productId is required"},
                             status=status.HTTP_400_BAD_REQUEST)
         try:
-            sell_quantity = int(sell_quantity)
-            product = StoreItem.objects.get(id=product_id)
-        except (StoreItem.DoesNotExist, ValueError):
-            return Response({"error": "Invalid productId or quantity"},
-                            status=status.HTTP_400_BAD_REQUEST)
+            sell(product_id, sell_quantity)
+        except StockError as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
+
+        return Response({"message": "Product sold"}, status=status.HTTP_200_OK)
 
-        if product.status != "showcase":
-            return Response({"error": "Product is not on store"},
+class CheckoutView(APIView):
+    permission_classes = [IsAuthenticated, IsManager]
+
+    @swagger_auto_schema(
+        security=[{"Bearer": []}],
+        tags=["Store"],
+        operation_summary="Продать корзину товаров",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["lines"],
+            properties={
+                "lines": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            "barcode": openapi.Schema(type=openapi.TYPE_STRING),
+                            "productId": openapi.Schema(type=openapi.TYPE_INTEGER),
+                            "quantity": openapi.Schema(type=openapi.TYPE_INTEGER, default=1),
+                        },
+                    ),
+                ),
+            },
+        ),
+        responses={200: "Результат по каждой строке корзины"},
+    )
+    def post(self, request):
+        lines = request.data.get("lines")
+        if not isinstance(lines, list) or not lines:
+            return Response({"error": "lines must be a non-empty list"},
                             status=status.HTTP_400_BAD_REQUEST)
-        if product.quantity < sell_quantity:
-            return Response({"error": "Insufficient quantity on store"},
+        if len(lines) > MAX_BASKET_SIZE:
+            return Response({"error": f"At most {MAX_BASKET_SIZE} lines per request"},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        product.quantity -= sell_quantity
-        if product.quantity == 0:
-            product.status = "deleted"
-        product.save()
-
-        # создаём / увеличиваем sold‑запись
-        sold_item, _ = StoreItem.objects.get_or_create(
-            barcode=product.barcode,
-            status="sold",
-            defaults={
-                "name":      product.name,
-                "category":  product.category,
-                "quantity":  0,
-                "price":     product.price,
-                "expire_date": product.expire_date,
-                "added_at":  timezone.now(),
+        results = checkout(lines)
+        sold = [result for result in results if result["status"] == "sold"]
+        return Response(
+            {
+                "message": "Checkout processed",
+                "sold": len(sold),
+                "failed": len(results) - len(sold),
+                "results": results,
             },
+            status=status.HTTP_200_OK,
         )
-        sold_item.quantity += sell_quantity
-        sold_item.save()
-
-        return Response({"message": "Product sold"}, status=status.HTTP_200_OK)
 
 class ScanBarcodeView(APIView):
     permission_classes = [IsAuthenticated, IsManager]
+    renderer_classes = FAST_RENDERER_CLASSES
 
     @swagger_auto_schema(
         security=[{"Bearer": []}],
@@ -261,20 +339,52 @@ class ScanBarcodeView(APIView):
         responses={200: "Информация о товаре", 404: "Not found"},
     )
     def get(self, request, barcode):
-        try:
-            product = (
-                StoreItem.objects
-                .filter(barcode=barcode, status="showcase")
-                .first()
-            )
-            if not product:
-                raise StoreItem.DoesNotExist
-        except StoreItem.DoesNotExist:
+        data = get_showcase_item(barcode)
+        if data is None:
             return Response({"error": "Product not found on showcase"},
                             status=status.HTTP_404_NOT_FOUND)
 
-        serializer = StoreItemSerializer(product)
-        data = serializer.data
+        data = dict(data)
         data["message"] = "All data about product. Can sell."
 
-        return Response(data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ScanBasketView(APIView):
+    permission_classes = [IsAuthenticated, IsManager]
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    @swagger_auto_schema(
+        security=[{"Bearer": []}],
+        tags=["Store"],
+        operation_summary="Поиск корзины товаров по штрих‑кодам",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["barcodes"],
+            properties={
+                "barcodes": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(type=openapi.TYPE_STRING),
+                ),
+            },
+        ),
+        responses={200: "Товары по штрих‑кодам и список ненайденных"},
+    )
+    def post(self, request):
+        barcodes = request.data.get("barcodes")
+        if not isinstance(barcodes, list) or not barcodes:
+            return Response({"error": "barcodes must be a non-empty list"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        barcodes = [str(barcode) for barcode in barcodes]
+        if len(barcodes) > MAX_BASKET_SIZE:
+            return Response({"error": f"At most {MAX_BASKET_SIZE} barcodes per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        items = get_showcase_items(barcodes)
+        return Response(
+            {
+                "items": items,
+                "not_found": [barcode for barcode in dict.fromkeys(barcodes) if barcode not in items],
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -12,8 +12,29 @@ app.conf.beat_schedule = {
         'task': 'store.tasks.send_expiry_notifications',
         'schedule': crontab(hour=0, minute=0),
     },
-    'forecast-by-category-every-day': {
-        'task': 'store.tasks.forecast_by_category',
+    'refresh-expired-flags-every-day': {
+        'task': 'store.tasks.refresh_expired_flags',
+        'schedule': crontab(hour=0, minute=1),
+    },
+    'remove-expired-stock-every-day': {
+        'task': 'store.tasks.remove_expired_stock',
+        'schedule': crontab(hour=0, minute=10),
+        'kwargs': {'scheduled': True},
+    },
+    'apply-markdown-rules-every-day': {
+        'task': 'store.tasks.apply_markdown_rules',
+        'schedule': crontab(hour=0, minute=20),
+    },
+    'flush-mail-outbox-every-minute': {
+        'task': 'accounts.tasks.flush_outbox',
+        'schedule': crontab(minute='*'),
+    },
+    'compact-daily-sales-every-5-minutes': {
+        'task': 'store.tasks.compact_daily_sales',
+        'schedule': crontab(minute='*/5'),
+    },
+    'forecast-snapshot-every-day': {
+        'task': 'prediction.forecast_tasks.refresh_forecast_snapshot',
         'schedule': crontab(hour=0, minute=0),
     },
 }
@@ -0,0 +1,143 @@
+from datetime import datetime, date, timedelta
+import unicodedata
+from dateutil import parser as date_parser
+import numpy as np
+import pandas as pd
+import re
+
+DASH_RE = re.compile(r"[\u2010-\u2015\u2212\uFE58\uFE63\uFF0D]")
+
+KNOWN_FORMATS = [
+    "%Y-%m-%d", "%d-%m-%Y", "%m-%d-%Y",
+    "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y",
+    "%d.%m.%Y", "%Y.%m.%d",
+]
+EXCEL_EPOCH = date(1899, 12, 30)
+VALUE_KINDS = {
+    pd.Timestamp: "datetime", datetime: "datetime", date: "datetime",
+    int: "number", float: "number", np.int64: "number", np.float64: "number",
+    str: "string",
+}
+# Сколько уникальных значений колонки смотрим при определении формата
+FORMAT_SAMPLE_SIZE = 200
+
+
+def _clean(value) -> str:
+    cleaned = str(value).strip()
+    cleaned = unicodedata.normalize("NFKD", cleaned)
+    return DASH_RE.sub("-", cleaned)
+
+
+def parse_date(value) -> date | None:
+    """
+    Универсальный парсер одной даты (медленный путь):
+    • Timestamp / datetime / date
+    • Excel‑serial (число)
+    • Строки с любыми тире, слешами, точками: 2025‑04‑09, 09‑04‑2025, 4/9/25, 09.04.2025
+    """
+    if pd.isna(value):
+        return None
+
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.date()
+    if isinstance(value, date):
+        return value
+
+    # Excel serial
+    if isinstance(value, (int, float, np.number)):
+        try:
+            return EXCEL_EPOCH + timedelta(days=int(value))
+        except (ValueError, OverflowError):
+            pass
+
+    cleaned = _clean(value)
+    for fmt in KNOWN_FORMATS:
+        try:
+            return datetime.strptime(cleaned, fmt).date()
+        except ValueError:
+            continue
+
+    try:
+        return date_parser.parse(cleaned, fuzzy=True, dayfirst=False).date()
+    except (ValueError, OverflowError):
+        raise ValueError(f"Unrecognised date format: {value!r}")
+
+
+def _safe_parse_date(value) -> date | None:
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def detect_formats(strings: pd.Series) -> list[str]:
+    """
+    Форматы из KNOWN_FORMATS, отсортированные по числу совпадений на выборке колонки.
+    При равенстве сохраняется порядок KNOWN_FORMATS (как у parse_date).
+    """
+    sample = strings.drop_duplicates().head(FORMAT_SAMPLE_SIZE)
+    hits = []
+    for fmt in KNOWN_FORMATS:
+        matched = pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum()
+        if matched:
+            hits.append((matched, fmt))
+    hits.sort(key=lambda hit: -hit[0])
+    return [fmt for _, fmt in hits]
+
+
+def _excel_serials(numbers: pd.Series) -> pd.Series:
+    return pd.to_datetime(np.trunc(numbers.astype("float64")), unit="D", origin=EXCEL_EPOCH.isoformat(), errors="coerce")
+
+
+def parse_date_column(series: pd.Series) -> pd.Series:
+    """
+    Разбирает всю колонку дат целиком.
+    Формат определяется один раз по выборке, колонка конвертируется через pd.to_datetime(format=...),
+    и только несовпавшие значения идут через parse_date. Результат: date или None.
+    """
+    parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    present = series.notna()
+    if not present.any():
+        return pd.Series(None, index=series.index, dtype=object)
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        parsed = series.dt.tz_localize(None) if series.dt.tz is not None else series
+    elif pd.api.types.is_numeric_dtype(series):
+        parsed = _excel_serials(series)
+    else:
+        kind = series.map(type).map(VALUE_KINDS)
+
+        datetimes = kind == "datetime"
+        if datetimes.any():
+            parsed[datetimes] = pd.to_datetime(series[datetimes], errors="coerce")
+
+        numbers = kind == "number"
+        if numbers.any():
+            parsed[numbers] = _excel_serials(series[numbers])
+
+        strings = kind == "string"
+        if strings.any():
+            cleaned = (
+                series[strings].str.strip()
+                .str.normalize("NFKD")
+                .str.replace(DASH_RE, "-", regex=True)
+            )
+            for fmt in detect_formats(cleaned):
+                if cleaned.empty:
+                    break
+                converted = pd.to_datetime(cleaned, format=fmt, errors="coerce")
+                matched = converted.notna()
+                parsed[matched[matched].index] = converted[matched]
+                cleaned = cleaned[~matched]
+
+    result = pd.Series(None, index=series.index, dtype=object)
+    done = parsed.notna()
+    result[done] = parsed[done].dt.date
+
+    # Медленный путь: datetime‑объекты, значения вне диапазона pandas, «грязные» строки
+    leftovers = series[present & ~done]
+    if not leftovers.empty:
+        uniques = leftovers.unique()
+        mapping = {value: _safe_parse_date(value) for value in uniques}
+        result[leftovers.index] = leftovers.map(mapping)
+    return result.where(result.notna(), None)
@@ -0,0 +1,238 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from contextlib import nullcontext
+from datetime import date
+from typing import Iterable, Iterator
+import numpy as np
+import openpyxl
+import pandas as pd
+from store.horizon import invalidate_horizon
+from store.models import StoreItem
+from .models import Upload
+from .dateparse import parse_date_column
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Верхняя граница DecimalField(max_digits=10, decimal_places=2)
+MAX_PRICE = 10 ** 8
+# Верхняя граница IntegerField
+MAX_QUANTITY = 2 ** 31
+# Сколько ошибок по строкам отдаём клиенту
+MAX_REPORTED_ERRORS = 1000
+
+
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+
+class UnsupportedFileFormat(ValueError):
+    pass
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    if name in df.columns:
+        return df[name]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def coerce_frame(df: pd.DataFrame) -> tuple[pd.DataFrame, list[dict]]:
+    """
+    Векторно приводит колонки файла к типам StoreItem.
+    Возвращает DataFrame с валидными строками и список ошибок вида {"row": idx, "error": "..."}.
+    """
+    name = _column(df, "name")
+    name = name.where(name.isna(), name.astype(str).str.strip())
+    category = _column(df, "category")
+    category = category.where(category.isna(), category.astype(str).str.strip())
+
+    quantity = pd.to_numeric(_column(df, "quantity"), errors="coerce")
+    price_raw = _column(df, "price")
+    price = pd.to_numeric(price_raw, errors="coerce")
+    expire_date = parse_date_column(_column(df, "expire_date"))
+
+    checks = [
+        (name.isna() | (name == ""), "name is required"),
+        (~np.isfinite(quantity), "quantity must be an integer"),
+        (quantity.abs() >= MAX_QUANTITY, "quantity is out of range"),
+        (price_raw.notna() & ~np.isfinite(price), "price must be a number"),
+        (price.abs() >= MAX_PRICE, "price is out of range"),
+        (expire_date.isna(), "expire_date is missing or has an unrecognised format"),
+    ]
+    invalid = pd.Series(False, index=df.index)
+    errors = {}
+    for mask, message in checks:
+        fresh = mask & ~invalid
+        for idx in df.index[fresh]:
+            errors[idx] = message
+        invalid |= mask
+
+    valid = ~invalid
+    frame = pd.DataFrame({
+        "name": name[valid],
+        "category": category[valid].astype(object).where(category[valid].notna(), None),
+        "quantity": np.trunc(quantity[valid]).astype("int64"),
+        "price": price[valid].round(2),
+        "expire_date": expire_date[valid],
+    })
+    report = [{"row": int(idx), "error": errors[idx]} for idx in sorted(errors)]
+    return frame, report
+
+
+def _build_items(frame: pd.DataFrame, upload, today: date) -> list[StoreItem]:
+    barcodes = StoreItem.generate_unique_barcodes(len(frame))
+    items = []
+    rows = zip(frame["name"], frame["category"], frame["quantity"], frame["price"], frame["expire_date"])
+    for (name, category, quantity, price, expire_date), barcode in zip(rows, barcodes):
+        items.append(StoreItem(
+            name=name,
+            category=category,
+            quantity=int(quantity),
+            price=None if pd.isna(price) else round(float(price), 2),
+            expire_date=expire_date,
+            status="warehouse",
+            is_expired=expire_date < today,
+            barcode=barcode,
+            warehouse_upload=upload,
+        ))
+    return items
+
+
+def _iter_xlsx(path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    # read_only: openpyxl отдаёт строки по одной, не загружая лист целиком
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [
+            str(title).strip() if title is not None else f"Unnamed: {pos}"
+            for pos, title in enumerate(header)
+        ]
+        batch, index = [], []
+        # Пустые строки не нумеруются — как у read_csv (skip_blank_lines), номера в ошибках совпадают
+        position = 0
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row[:len(columns)])
+            index.append(position)
+            position += 1
+            if len(batch) == chunk_size:
+                yield pd.DataFrame.from_records(batch, columns=columns, index=index)
+                batch, index = [], []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns, index=index)
+    finally:
+        workbook.close()
+
+
+def iter_frames(path, file_name: str, chunk_size: int | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Потоково читает файл пачками по chunk_size строк (по умолчанию WAREHOUSE_IMPORT_BATCH_SIZE).
+    Индекс DataFrame — номер строки данных в файле, сквозной между пачками.
+    """
+    chunk_size = chunk_size or settings.WAREHOUSE_IMPORT_BATCH_SIZE
+    lower = file_name.lower()
+    if lower.endswith(".csv"):
+        yield from pd.read_csv(path, encoding="utf-8-sig", chunksize=chunk_size)
+    elif lower.endswith(".xlsx"):
+        yield from _iter_xlsx(path, chunk_size)
+    elif lower.endswith(".xls"):
+        # Для старого бинарного формата потокового чтения нет
+        yield pd.read_excel(path)
+    else:
+        raise UnsupportedFileFormat(file_name)
+
+
+def is_supported(file_name: str) -> bool:
+    return file_name.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def count_rows(path, file_name: str) -> int | None:
+    """Оценка числа строк данных без разбора файла (для прогресса импорта)."""
+    lower = file_name.lower()
+    if lower.endswith(".csv"):
+        if os.path.getsize(path) == 0:
+            return 0
+        lines = 0
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                lines += block.count(b"\n")
+            fh.seek(-1, 2)
+            if fh.read(1) != b"\n":
+                lines += 1
+        return max(lines - 1, 0)
+    if lower.endswith(".xlsx"):
+        workbook = openpyxl.load_workbook(path, read_only=True)
+        try:
+            max_row = workbook.worksheets[0].max_row
+        finally:
+            workbook.close()
+        return max(max_row - 1, 0) if max_row else None
+    return None
+
+
+def run_import(upload, frames: Iterable[pd.DataFrame] | None = None, atomic: bool = False) -> None:
+    """
+    Импортирует файл Upload пачками через bulk_create.
+    Каждая пачка коммитится вместе с прогрессом в Upload (processed_rows и счётчики),
+    поэтому прерванный импорт продолжается с первой незакоммиченной строки.
+    atomic=True (синхронная загрузка) — весь файл в одной транзакции: при ошибке
+    в StoreItem не остаётся ни одной строки, повторная загрузка ничего не задвоит.
+    """
+    path = default_storage.path(upload.file_path)
+    if frames is None:
+        frames = iter_frames(path, upload.file_name)
+
+    today = timezone.now().date()
+    reported = list(upload.errors)
+    Upload.objects.filter(pk=upload.pk).update(status=Upload.STATUS_PROCESSING)
+
+    progress = ["processed_rows", "imported_rows", "failed_rows", "errors"]
+    try:
+        if upload.total_rows is None:
+            upload.total_rows = count_rows(path, upload.file_name)
+            Upload.objects.filter(pk=upload.pk).update(total_rows=upload.total_rows)
+        with transaction.atomic() if atomic else nullcontext():
+            for df in frames:
+                # Строки, закоммиченные до перезапуска воркера, пропускаем
+                df = df[df.index >= upload.processed_rows]
+                if df.empty:
+                    continue
+                df = df.drop(columns=[c for c in ("barcode",) if c in df.columns])
+                frame, errors = coerce_frame(df)
+                for error in errors:
+                    logger.error("Ошибка при импорте строки %s: %s", error["row"], error["error"])
+                reported.extend(errors[:MAX_REPORTED_ERRORS - len(reported)])
+
+                with transaction.atomic():
+                    items = _build_items(frame, upload, today)
+                    StoreItem.objects.bulk_create(items)
+                    transaction.on_commit(invalidate_horizon)
+                    upload.processed_rows = int(df.index[-1]) + 1
+                    upload.imported_rows += len(items)
+                    upload.failed_rows += len(errors)
+                    upload.errors = reported
+                    upload.save(update_fields=progress)
+    except Exception as exc:
+        fields = ["status", "message", "finished_at"]
+        if atomic:
+            # Пачки откатились вместе с транзакцией — счётчики тоже
+            upload.processed_rows = upload.imported_rows = upload.failed_rows = 0
+            upload.errors = []
+            fields += progress
+        upload.status = Upload.STATUS_FAILED
+        upload.message = str(exc)
+        upload.finished_at = timezone.now()
+        upload.save(update_fields=fields)
+        default_storage.delete(upload.file_path)
+        raise
+
+    upload.status = Upload.STATUS_DONE
+    upload.finished_at = timezone.now()
+    upload.save(update_fields=["status", "finished_at"])
+    default_storage.delete(upload.file_path)
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from datetime import date, timedelta
+import time
+import numpy as np
+import pandas as pd
+from warehouse_app.dateparse import parse_date_column, _safe_parse_date
+
+
+def make_mixed_column(rows: int, seed: int = 0) -> pd.Series:
+    """Колонка как в реальных выгрузках: доминирующий формат, ISO, Excel‑serial, текст и мусор."""
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 3650, rows)
+    kinds = rng.choice(5, rows, p=[0.70, 0.15, 0.08, 0.04, 0.03])
+    base = date(2024, 1, 1)
+    values = []
+    for offset, kind in zip(days, kinds):
+        day = base + timedelta(days=int(offset))
+        if kind == 0:
+            values.append(day.strftime("%d.%m.%Y"))
+        elif kind == 1:
+            values.append(day.strftime("%Y‑%m‑%d"))
+        elif kind == 2:
+            values.append((day - date(1899, 12, 30)).days)
+        elif kind == 3:
+            values.append(day.strftime("%B %d %Y"))
+        else:
+            values.append("n/a")
+    return pd.Series(values, dtype=object)
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark: per-cell date parsing vs. column-level parse_date_column'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def timed(self, func, column, repeat):
+        best = None
+        result = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func(column)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        column = make_mixed_column(rows)
+
+        per_cell, expected = self.timed(lambda c: c.map(_safe_parse_date), column, repeat)
+        vectorized, actual = self.timed(parse_date_column, column, repeat)
+
+        mismatches = int((expected.fillna(0) != actual.fillna(0)).sum())
+        self.stdout.write(f"rows:        {rows}")
+        self.stdout.write(f"per-cell:    {per_cell:.3f}s ({rows / per_cell:,.0f} rows/s)")
+        self.stdout.write(f"column:      {vectorized:.3f}s ({rows / vectorized:,.0f} rows/s)")
+        self.stdout.write(f"speedup:     x{per_cell / vectorized:.1f}")
+        self.stdout.write(f"mismatches:  {mismatches}")
@@ -0,0 +1,64 @@
+# Generated by Django 5.2 on 2026-10-18 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='errors',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='failed_rows',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='file_path',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='imported_rows',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='processed_rows',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='done', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='total_rows',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        # Загрузки, сделанные до появления фоновых импортов, уже завершены
+        migrations.AlterField(
+            model_name='upload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from store.serializers import DynamicFieldsModelSerializer
 from .models import Upload
 
-class UploadSerializer(serializers.ModelSerializer):
+class UploadSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Upload
-        fields = '__all__'
+        exclude = ('file_path',)
 
 class UploadFileSerializer(serializers.Serializer):
     file = serializers.FileField(
@@ -0,0 +1,14 @@
+from celery import shared_task
+from .models import Upload
+from .importers import run_import
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def import_upload(upload_id):
+    # acks_late: если воркер упал посреди файла, задача вернётся в очередь
+    # и run_import продолжит с последней закоммиченной пачки
+    upload = Upload.objects.get(id=upload_id)
+    if upload.status in (Upload.STATUS_DONE, Upload.STATUS_FAILED):
+        return f"Upload {upload_id} already {upload.status}"
+    run_import(upload)
+    return f"Imported {upload.imported_rows} rows, {upload.failed_rows} failed"
@@ -1,3 +1,226 @@
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from datetime import date, datetime, timedelta
+from io import BytesIO
+import openpyxl
+import pandas as pd
+from rest_framework.test import APITestCase
+from rest_framework import status
+from accounts.models import User
+from store.horizon import invalidate_horizon
+from store.models import StoreItem
+from store.services import sell
+from .models import Upload
+from .tasks import import_upload
+from .dateparse import parse_date_column
 
-# Create your tests here.
+
+class FileUploadTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='manager@example.com', username='manager', password='strong_password_123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, content):
+        file_obj = SimpleUploadedFile(name, content.encode('utf-8'), content_type='text/csv')
+        return self.client.post(reverse('file-upload'), {'file': file_obj}, format='multipart')
+
+    def test_csv_import_reports_bad_rows(self):
+        content = (
+            "name,category,quantity,price,expire_date\n"
+            "Milk,Dairy,10,1.5,2030-01-31\n"
+            "Bread,,3,,31.01.2030\n"
+            "Cheese,Dairy,abc,5,2030-01-31\n"
+            "Butter,Dairy,2,4.2,not a date\n"
+        )
+        response = self.upload('goods.csv', content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual([e['row'] for e in response.data['errors']], [2, 3])
+
+        items = StoreItem.objects.order_by('name')
+        self.assertEqual([i.name for i in items], ['Bread', 'Milk'])
+        bread = items[0]
+        self.assertIsNone(bread.category)
+        self.assertIsNone(bread.price)
+        self.assertEqual(str(bread.expire_date), '2030-01-31')
+        self.assertEqual(len({i.barcode for i in items}), 2)
+
+    @override_settings(WAREHOUSE_IMPORT_BATCH_SIZE=2)
+    def test_xlsx_import_in_batches(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["name", "category", "quantity", "price", "expire_date"])
+        for pos in range(5):
+            sheet.append([f"Item {pos}", "Snacks", pos + 1, 2.5, datetime(2030, 1, pos + 1)])
+        sheet.append([None, None, None, None, None])
+        sheet.append(["Broken", "Snacks", None, 1, datetime(2030, 1, 1)])
+        buffer = BytesIO()
+        workbook.save(buffer)
+
+        file_obj = SimpleUploadedFile('goods.xlsx', buffer.getvalue())
+        response = self.client.post(reverse('file-upload'), {'file': file_obj}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['imported'], 5)
+        self.assertEqual(response.data['errors'], [{'row': 5, 'error': 'quantity must be an integer'}])
+        self.assertEqual(StoreItem.objects.filter(category='Snacks').count(), 5)
+
+    def test_blank_rows_numbered_alike_in_csv_and_xlsx(self):
+        rows = [["Tea", 4, "2030-05-01"], None, ["Coffee", None, "2030-05-01"]]
+        content = "name,quantity,expire_date\n" + "".join(
+            "\n" if row is None else ",".join("" if v is None else str(v) for v in row) + "\n" for row in rows
+        )
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["name", "quantity", "expire_date"])
+        for row in rows:
+            sheet.append(row or [None, None, None])
+        buffer = BytesIO()
+        workbook.save(buffer)
+
+        csv_errors = self.upload('goods.csv', content).data['errors']
+        file_obj = SimpleUploadedFile('goods.xlsx', buffer.getvalue())
+        xlsx_errors = self.client.post(reverse('file-upload'), {'file': file_obj}, format='multipart').data['errors']
+        self.assertEqual(csv_errors, [{'row': 1, 'error': 'quantity must be an integer'}])
+        self.assertEqual(xlsx_errors, csv_errors)
+
+    @override_settings(WAREHOUSE_IMPORT_BATCH_SIZE=2)
+    def test_sync_import_failing_midway_keeps_nothing(self):
+        content = (
+            "name,quantity,expire_date\n"
+            "Tea,4,2030-05-01\nCoffee,2,2030-05-01\nSugar,1,2030-05-01\nSalt,1,2030-05-01,x,y\n"
+        )
+        response = self.upload('goods.csv', content)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(StoreItem.objects.exists())
+        upload = Upload.objects.get()
+        self.assertEqual((upload.status, upload.processed_rows, upload.imported_rows),
+                         (Upload.STATUS_FAILED, 0, 0))
+
+    def test_async_import_job(self):
+        content = "name,quantity,expire_date\nTea,4,2030-05-01\nCoffee,,2030-05-01\n"
+        file_obj = SimpleUploadedFile('goods.csv', content.encode('utf-8'), content_type='text/csv')
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(
+                reverse('file-upload') + '?async=true', {'file': file_obj}, format='multipart'
+            )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(len(callbacks), 1)
+        job_id = response.data['job_id']
+        self.assertEqual(Upload.objects.get(id=job_id).status, Upload.STATUS_PENDING)
+
+        import_upload(str(job_id))
+
+        response = self.client.get(reverse('upload-status', args=[job_id]))
+        self.assertEqual(response.data['status'], Upload.STATUS_DONE)
+        self.assertEqual(
+            (response.data['total'], response.data['processed'], response.data['imported'], response.data['failed']),
+            (2, 2, 1, 1),
+        )
+
+    def test_empty_async_upload_fails_cleanly(self):
+        file_obj = SimpleUploadedFile('empty.csv', b'', content_type='text/csv')
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post(
+                reverse('file-upload') + '?async=true', {'file': file_obj}, format='multipart'
+            )
+        upload = Upload.objects.get(id=response.data['job_id'])
+        with self.assertRaises(Exception):
+            import_upload(str(upload.id))
+
+        upload.refresh_from_db()
+        self.assertEqual((upload.status, upload.total_rows), (Upload.STATUS_FAILED, 0))
+        self.assertTrue(upload.message)
+        self.assertFalse(default_storage.exists(upload.file_path))
+
+    def test_import_resumes_from_checkpoint(self):
+        content = "name,quantity,expire_date\nTea,4,2030-05-01\nCoffee,2,2030-05-01\nSugar,1,2030-05-01\n"
+        file_path = default_storage.save('uploads/resume.csv', ContentFile(content.encode('utf-8')))
+        upload = Upload.objects.create(
+            file_name='resume.csv', file_path=file_path, status=Upload.STATUS_PROCESSING,
+            processed_rows=1, imported_rows=1,
+        )
+        import_upload(str(upload.id))
+
+        upload.refresh_from_db()
+        self.assertEqual((upload.status, upload.imported_rows), (Upload.STATUS_DONE, 3))
+        self.assertEqual(
+            sorted(StoreItem.objects.filter(warehouse_upload=upload).values_list('name', flat=True)),
+            ['Coffee', 'Sugar'],
+        )
+        self.assertFalse(default_storage.exists(file_path))
+
+
+class ExpiringItemsTests(APITestCase):
+    def setUp(self):
+        invalidate_horizon()
+        self.user = User.objects.create_user(
+            email='dashboard@example.com', username='dashboard', password='strong_password_123'
+        )
+        self.client.force_authenticate(self.user)
+        today = date.today()
+        for name, category, days, item_status in [
+            ('Milk', 'Dairy', 3, 'showcase'),
+            ('Kefir', 'Dairy', 1, 'warehouse'),
+            ('Ham', 'Meat', 2, 'showcase'),
+            ('Sold milk', 'Dairy', 1, 'sold'),
+            ('Deleted ham', 'Meat', 1, 'deleted'),
+            ('Old bread', 'Bakery', -2, 'warehouse'),
+            ('Far cheese', 'Dairy', 40, 'warehouse'),
+        ]:
+            StoreItem.objects.create(name=name, category=category, quantity=1,
+                                     expire_date=today + timedelta(days=days), status=item_status)
+        self.url = reverse('expiring-items')
+
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['name'] for row in response.data]
+
+    def test_active_items_by_expiry_with_filters(self):
+        self.assertEqual(self.names(), ['Old bread', 'Kefir', 'Ham', 'Milk'])
+        self.assertEqual(self.names(days=1), ['Old bread', 'Kefir'])
+        self.assertEqual(self.names(category='Dairy'), ['Kefir', 'Milk'])
+        self.assertEqual(self.names(status='showcase'), ['Ham', 'Milk'])
+        self.assertEqual(self.names(category='Dairy', status='showcase', days=5), ['Milk'])
+        # Горизонт длиннее снимка отдаётся из БД в том же порядке
+        self.assertEqual(self.names(days=60, category='Dairy'), ['Kefir', 'Milk', 'Far cheese'])
+        self.assertEqual(self.client.get(self.url, {'status': 'sold'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'days': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_served_from_snapshot_until_a_write(self):
+        self.names()
+        with self.assertNumQueries(0):
+            seen = []
+            response = self.client.get(self.url, {'limit': 3, 'fields': 'id,name'})
+            while True:
+                seen += [row['name'] for row in response.data['results']]
+                if response.data['next_cursor'] is None:
+                    break
+                response = self.client.get(self.url, {'limit': 3, 'fields': 'id,name',
+                                                      'cursor': response.data['next_cursor']})
+        self.assertEqual(seen, ['Old bread', 'Kefir', 'Ham', 'Milk'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sell(StoreItem.objects.get(name='Ham').id)
+        self.assertEqual(self.names(), ['Old bread', 'Kefir', 'Milk'])
+
+
+class DateColumnParserTests(SimpleTestCase):
+    def test_mixed_formats(self):
+        column = pd.Series(
+            ["09.04.2025", "10.04.2025", "2025\u201104\u201111", 45000, "April 5 2026", "n/a", None],
+            dtype=object,
+        )
+        self.assertEqual(parse_date_column(column).tolist(), [
+            date(2025, 4, 9), date(2025, 4, 10), date(2025, 4, 11),
+            date(2023, 3, 15), date(2026, 4, 5), None, None,
+        ])
+
+    def test_excel_serial_column(self):
+        column = pd.Series([45000, 45001.5])
+        self.assertEqual(parse_date_column(column).tolist(), [date(2023, 3, 15), date(2023, 3, 16)])
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     FileUploadView,
+    UploadStatusView,
     UploadListView,
     WarehouseItemsView,
     TransferToStoreView,
@@ -9,6 +10,7 @@ from .views import (
 
 urlpatterns = [
     path('upload', FileUploadView.as_view(), name='file-upload'),
+    path('upload/<uuid:upload_id>/status', UploadStatusView.as_view(), name='upload-status'),
     path('files', UploadListView.as_view(), name='upload-list'),
     path('items/<uuid:file_id>', WarehouseItemsView.as_view(), name='warehouse-items'),
     path('to-store', TransferToStoreView.as_view(), name='transfer-to-store'),
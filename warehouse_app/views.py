@@ -2,25 +2,32 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
 from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
 from django.utils import timezone
-from datetime import datetime, date, timedelta
-import unicodedata
-from dateutil import parser as date_parser
+from datetime import timedelta
 import pandas as pd
 from .models import Upload
+from .importers import iter_frames, is_supported, run_import
+from .tasks import import_upload
 from store.models import StoreItem
+from accounts.authentication import request_user, forget_user
 from .serializers import UploadSerializer, UploadFileSerializer
 from store.serializers import StoreItemSerializer
+from store.services import move_stock, StockError
+from store.pagination import list_response, LIST_PARAMETERS
+from store.renderers import FAST_RENDERER_CLASSES
+from store.horizon import horizon_response, ACTIVE_STATUSES, ORDERING as HORIZON_ORDERING
 import logging
 from rest_framework.parsers import MultiPartParser
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from uuid import uuid4
-import re
+from itertools import chain
 
 logger = logging.getLogger(__name__)
-DASH_RE = re.compile(r"[\u2010-\u2015\u2212\uFE58\uFE63\uFF0D]")
 
 class FileUploadView(APIView):
     permission_classes = [IsAuthenticated]
@@ -31,98 +38,100 @@ class FileUploadView(APIView):
         tags=["Warehouse"],
         operation_summary="Импорт товаров на склад",
         request_body=UploadFileSerializer,
+        manual_parameters=[openapi.Parameter(
+            name="async",
+            in_=openapi.IN_QUERY,
+            description="Импортировать в фоне (Celery): сразу 202 и job_id",
+            type=openapi.TYPE_BOOLEAN,
+        )],
         responses={
-            201: openapi.Response("Количество импортированных строк"),
+            201: openapi.Response("Количество импортированных строк и ошибки по строкам"),
+            202: openapi.Response("Импорт поставлен в очередь"),
             400: "Ошибка валидации / формата файла",
         },
     )
     def post(self, request):
-        def to_date(value) -> date | None:
-            """
-            Универсальный парсер даты:
-            • Timestamp / datetime / date
-            • Excel‑serial (число)
-            • Строки с любыми тире, слешами, точками: 2025‑04‑09, 09‑04‑2025, 4/9/25, 09.04.2025
-            """
-            if pd.isna(value):
-                return None
-
-            if isinstance(value, (pd.Timestamp, datetime)):
-                return value.date()
-            if isinstance(value, date):
-                return value
-
-            # Excel serial
-            if isinstance(value, (int, float)):
-                try:
-                    return (date(1899, 12, 30) + timedelta(days=int(value))).date()
-                except Exception:
-                    pass
-
-            cleaned = str(value).strip()
-            cleaned = unicodedata.normalize("NFKD", cleaned)
-            cleaned = DASH_RE.sub("-", cleaned)
-
-            known = [
-                "%Y-%m-%d", "%d-%m-%Y", "%m-%d-%Y",
-                "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y",
-                "%d.%m.%Y", "%Y.%m.%d",
-            ]
-            for fmt in known:
-                try:
-                    return datetime.strptime(cleaned, fmt).date()
-                except ValueError:
-                    continue
-
-            try:
-                return date_parser.parse(cleaned, fuzzy=True, dayfirst=False).date()
-            except (ValueError, OverflowError):
-                raise ValueError(f"Unrecognised date format: {value!r}")
-
         file_obj = request.FILES.get("file")
         if not file_obj:
             return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
+        if not is_supported(file_obj.name):
+            return Response({"error": "Unsupported file format"}, status=status.HTTP_400_BAD_REQUEST)
 
         file_path = default_storage.save(
             f"uploads/{uuid4()}_{file_obj.name}",
             file_obj
         )
+        run_async = str(request.query_params.get("async", "")).lower() in ("1", "true", "yes")
+
+        frames = None
+        if not run_async:
+            # Первая пачка читается до создания Upload: битый файл — сразу 400
+            try:
+                frames = iter_frames(default_storage.path(file_path), file_obj.name)
+                first = next(frames, None)
+                if first is not None:
+                    frames = chain([first], frames)
+            except Exception as exc:
+                default_storage.delete(file_path)
+                return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = Upload.objects.create(
+            file_name=file_obj.name,
+            file_path=file_path,
+            uploaded_by_id=request.user.id,
+        )
+        if request.user.role != "manager":
+            # Новая роль попадёт в claims со следующим токеном
+            user = request_user(request)
+            user.role = "manager"
+            user.save(update_fields=["role"])
+            forget_user(user.id)
+
+        if run_async:
+            transaction.on_commit(lambda: import_upload.delay(str(upload.id)))
+            return Response(
+                {"job_id": upload.id,
+                 "status": upload.status,
+                 "status_url": reverse("upload-status", args=[upload.id])},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
         try:
-            if file_obj.name.lower().endswith(".csv"):
-                df = pd.read_csv(default_storage.path(file_path), encoding="utf-8-sig")
-            elif file_obj.name.lower().endswith((".xls", ".xlsx")):
-                df = pd.read_excel(default_storage.path(file_path))
-            else:
-                return Response({"error": "Unsupported file format"}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as exc:
+            run_import(upload, frames, atomic=True)
+        except (ValueError, pd.errors.ParserError) as exc:
             return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"imported": upload.imported_rows, "failed": upload.failed_rows, "errors": upload.errors},
+            status=status.HTTP_201_CREATED,
+        )
 
-        df = df.drop(columns=[c for c in ("barcode",) if c in df.columns])
 
-        upload = Upload.objects.create(file_name=file_obj.name, uploaded_by=request.user)
-        if request.user.role != "manager":
-            request.user.role = "manager"
-            request.user.save()
+class UploadStatusView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        imported = 0
-        for idx, row in df.iterrows():
-            try:
-                StoreItem.objects.create(
-                    name=row.get("name"),
-                    category=row.get("category"),
-                    quantity=int(row.get("quantity")),
-                    price=float(row["price"]) if pd.notna(row.get("price")) else None,
-                    expire_date=to_date(row.get("expire_date")),
-                    status="warehouse",
-                    barcode=None,
-                    warehouse_upload=upload,
-                )
-                imported += 1
-            except Exception as exc:
-                logger.error("Ошибка при импорте строки %s: %s", idx, exc)
-                continue
-        default_storage.delete(file_path)
-        return Response({"imported": imported}, status=status.HTTP_201_CREATED)
+    @swagger_auto_schema(
+        security=[{"Bearer": []}],
+        tags=["Warehouse"],
+        operation_summary="Статус фонового импорта",
+        responses={200: openapi.Response("Прогресс импорта"), 404: "Upload not found"},
+    )
+    def get(self, request, upload_id):
+        try:
+            upload = Upload.objects.get(id=upload_id)
+        except Upload.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "job_id": upload.id,
+            "status": upload.status,
+            "total": upload.total_rows,
+            "processed": upload.processed_rows,
+            "imported": upload.imported_rows,
+            "failed": upload.failed_rows,
+            "errors": upload.errors,
+            "message": upload.message,
+            "finished_at": upload.finished_at,
+        })
 
 
 class UploadListView(APIView):
@@ -132,26 +141,27 @@ class UploadListView(APIView):
         security=[{"Bearer": []}],
         tags=["Warehouse"],
         operation_summary="Список загруженных файлов",
+        manual_parameters=LIST_PARAMETERS,
     )
     def get(self, request):
         uploads = Upload.objects.all()
-        serializer = UploadSerializer(uploads, many=True)
-        return Response(serializer.data)
+        return list_response(request, uploads, UploadSerializer, ordering=('uploaded_at', 'id'))
 
 
 class WarehouseItemsView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = FAST_RENDERER_CLASSES
 
     @swagger_auto_schema(
         security=[{"Bearer": []}],
         tags=["Warehouse"],
         operation_summary="Товары конкретного файла",
+        manual_parameters=LIST_PARAMETERS,
         responses={200: StoreItemSerializer(many=True)},
     )
     def get(self, request, file_id):
-        items = StoreItem.objects.filter(warehouse_upload_id=file_id, status='warehouse')
-        serializer = StoreItemSerializer(items, many=True)
-        return Response(serializer.data)
+        items = StoreItem.objects.filter(warehouse_upload_id=file_id, status='warehouse').with_expiry()
+        return list_response(request, items, StoreItemSerializer, fast=True)
 
 class TransferToStoreView(APIView):
     permission_classes = [IsAuthenticated]
@@ -186,42 +196,9 @@ class TransferToStoreView(APIView):
                             status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            transfer_quantity = int(transfer_quantity)
-            product = StoreItem.objects.get(id=product_id)
-        except (StoreItem.DoesNotExist, ValueError):
-            return Response({"error": "Invalid productId or quantity"},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        if product.status != "warehouse":
-            return Response({"error": "Product is not on warehouse"},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        if product.quantity < transfer_quantity:
-            return Response({"error": "Insufficient quantity on warehouse"},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        if product.quantity == transfer_quantity:
-            product.status = "showcase"
-            product.save()
-            target_item = product
-        else:
-            product.quantity -= transfer_quantity
-            product.save()
-
-            target_item, created = StoreItem.objects.get_or_create(
-                barcode=product.barcode,
-                status="showcase",
-                defaults={
-                    "name": product.name,
-                    "category": product.category,
-                    "quantity": 0,
-                    "price": product.price,
-                    "expire_date": product.expire_date,
-                    "warehouse_upload": product.warehouse_upload,
-                },
-            )
-            target_item.quantity += transfer_quantity
-            target_item.save()
+            target_item = move_stock(product_id, transfer_quantity, source="warehouse", target="showcase")
+        except StockError as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
 
         serializer = StoreItemSerializer(target_item)
         return Response(
@@ -234,22 +211,48 @@ class TransferToStoreView(APIView):
 
 class ExpiringItemsView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = FAST_RENDERER_CLASSES
 
     @swagger_auto_schema(
         security=[{"Bearer": []}],
         tags=["Warehouse"],
         operation_summary="Скоро истекающие товары",
-        manual_parameters=[openapi.Parameter(
-            name="days",
-            in_=openapi.IN_QUERY,
-            description="Горизонт в днях (по умолчанию 7)",
-            type=openapi.TYPE_INTEGER,
-        )],
+        operation_description="Товары на складе и витрине со сроком до today + days, по (expire_date, id). "
+                              "Горизонт до STORE_HORIZON['DAYS'] отдаётся из снимка в памяти.",
+        manual_parameters=[
+            openapi.Parameter(
+                name="days",
+                in_=openapi.IN_QUERY,
+                description="Горизонт в днях (по умолчанию 7)",
+                type=openapi.TYPE_INTEGER,
+            ),
+            openapi.Parameter(name="category", in_=openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter(name="status", in_=openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              enum=list(ACTIVE_STATUSES)),
+        ] + LIST_PARAMETERS,
     )
     def get(self, request):
-        threshold_days = int(request.query_params.get('days', 7))
-        today = timezone.now().date()
-        threshold_date = today + timedelta(days=threshold_days)
-        items = StoreItem.objects.filter(expire_date__lte=threshold_date)
-        serializer = StoreItemSerializer(items, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        try:
+            threshold_days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response({"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if threshold_days < 0:
+            return Response({"error": "days must not be negative"}, status=status.HTTP_400_BAD_REQUEST)
+        category = request.query_params.get('category') or None
+        item_status = request.query_params.get('status') or None
+        if item_status is not None and item_status not in ACTIVE_STATUSES:
+            return Response({"error": f"status must be one of: {', '.join(ACTIVE_STATUSES)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if threshold_days <= settings.STORE_HORIZON['DAYS']:
+            return horizon_response(request, threshold_days, category, item_status)
+
+        # Горизонт длиннее снимка — запрос в БД с теми же фильтрами и порядком
+        threshold_date = timezone.now().date() + timedelta(days=threshold_days)
+        items = StoreItem.objects.filter(
+            status__in=[item_status] if item_status else ACTIVE_STATUSES, expire_date__lte=threshold_date,
+        )
+        if category is not None:
+            items = items.filter(category=category)
+        return list_response(request, items.with_expiry(), StoreItemSerializer,
+                             ordering=HORIZON_ORDERING, fast=True)
\ No newline at end of file